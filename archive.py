@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+
+import contextlib
+import fcntl
+import hashlib
+import json
+import os
+import numpy as np
+
+# On-disk archive of evaluated layouts, shared by every run with the same physical configuration and by any number
+# of processes. Each configuration fingerprint has a directory of append-only files:
+#   genomes.bin        bit-packed raw_arrays, one row per layout
+#   column_powers.bin  their float64 column powers, the objective of a run derives power, cost and fitness from them
+#   index.bin          committed row count and capacity, then an open addressing hash table whose slots hold row + 1
+# Readers map the files without locking. A writer holds an flock on "lock" and raises the committed row count only
+# once the new rows and their index slots are written, so rows past that count are never read. A full index is
+# rebuilt twice as large in a new file that replaces the old one, readers notice and map the new file.
+
+fingerprint_setting_names = ["row_num", "column_num", "rotor_diameter", "grid_size_ver", "grid_size_hor", "entrainment_constant",
+                             "thrust_coefficient", "cut_in_wind_speed", "avg_wind_speed", "air_density", "power_coefficient", "wind_rose_bins"]
+index_header_size = 2       # committed row count, capacity
+initial_capacity = 1 << 12
+max_load = 0.5
+chunk_size = 1 << 16        # rows read at once by get_chunks
+
+
+def get_fingerprint(config):
+    settings = {name: getattr(config, name) for name in fingerprint_setting_names}
+    return hashlib.sha256(json.dumps(settings, sort_keys=True).encode()).hexdigest()[:16], settings
+
+
+def get_hashes(packed):
+    # 64 bit FNV-1a style hash of every packed row taken 8 bytes at a time, the same in every process unlike hash()
+    words = np.zeros((len(packed), (packed.shape[1] + 7) // 8 * 8), dtype=np.uint8)
+    words[:, :packed.shape[1]] = packed
+    hashes = np.full(len(packed), 14695981039346656037, dtype=np.uint64)
+    for word_column in words.view("<u8").T:
+        hashes = (hashes ^ word_column) * np.uint64(1099511628211)
+        hashes ^= hashes >> np.uint64(29)
+    # murmur3's finalizer spreads every bit over the low ones the slots are taken from
+    for multiplier in [0xff51afd7ed558ccd, 0xc4ceb9fe1a85ec53]:
+        hashes = (hashes ^ (hashes >> np.uint64(33))) * np.uint64(multiplier)
+    return hashes ^ (hashes >> np.uint64(33))
+
+
+def get_slots(packed, capacity):
+    return (get_hashes(packed) & np.uint64(capacity - 1)).astype(np.int64)
+
+
+def insert_rows(index, genomes, rows):
+    # puts rows into the slots of index (header excluded), every round places one row per contested slot
+    capacity = len(index)
+    slots = get_slots(genomes[rows], capacity)
+    pending = np.arange(len(rows))
+    while len(pending) > 0:
+        candidates = pending[index[slots[pending]] == 0]
+        placed_slots, first_indexes = np.unique(slots[candidates], return_index=True)
+        winners = candidates[first_indexes]
+        index[placed_slots] = rows[winners] + 1
+        pending = np.setdiff1d(pending, winners, assume_unique=True)
+        slots[pending] = (slots[pending] + 1) & (capacity - 1)
+
+
+class LayoutArchive:
+
+    def __init__(self, root_path, config, column_width):
+        self.fingerprint, settings = get_fingerprint(config)
+        self.path = os.path.join(root_path, self.fingerprint)
+        self.cell_num = config.cell_num
+        self.packed_width = (config.cell_num + 7) // 8
+        self.column_width = column_width
+        self.genomes_path = os.path.join(self.path, "genomes.bin")
+        self.column_powers_path = os.path.join(self.path, "column_powers.bin")
+        self.index_path = os.path.join(self.path, "index.bin")
+        self.index = None
+        self.index_inode = None
+        self.genomes = np.zeros((0, self.packed_width), dtype=np.uint8)
+        self.column_powers = np.zeros((0, self.column_width))
+
+        os.makedirs(self.path, exist_ok=True)
+        with self.get_lock():
+            if not os.path.exists(self.index_path):
+                with open(os.path.join(self.path, "settings.json"), "w") as settings_file:
+                    json.dump(settings, settings_file, indent=1)
+                for path in [self.genomes_path, self.column_powers_path]:
+                    open(path, "wb").close()
+                self.write_index(self.genomes, np.zeros(0, dtype=np.int64), initial_capacity)
+        self.refresh()
+
+    @contextlib.contextmanager
+    def get_lock(self):
+        with open(os.path.join(self.path, "lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def write_index(self, genomes, rows, capacity):
+        # a new index.bin holding rows of genomes, written aside and renamed over the old one
+        index = np.zeros(index_header_size + capacity, dtype=np.int64)
+        insert_rows(index[index_header_size:], genomes, rows)
+        index[0] = len(rows)
+        index[1] = capacity
+        temp_path = self.index_path + ".tmp"
+        with open(temp_path, "wb") as index_file:
+            index_file.write(index.tobytes())
+            index_file.flush()
+            os.fsync(index_file.fileno())
+        os.replace(temp_path, self.index_path)
+
+    def refresh(self):
+        # maps index.bin again when it was replaced, and the data files once more rows are committed than mapped
+        index_inode = os.stat(self.index_path).st_ino
+        if index_inode != self.index_inode:
+            # plain array views of the maps, indexing a np.memmap itself is several times slower
+            self.index = np.asarray(np.memmap(self.index_path, dtype=np.int64, mode="r"))
+            self.index_inode = index_inode
+        row_num = int(self.index[0])
+        if row_num > len(self.genomes):
+            self.genomes = np.asarray(np.memmap(self.genomes_path, dtype=np.uint8, mode="r", shape=(row_num, self.packed_width)))
+            self.column_powers = np.asarray(np.memmap(self.column_powers_path, dtype=float, mode="r", shape=(row_num, self.column_width)))
+        return row_num
+
+    def __len__(self):
+        return self.refresh()
+
+    def get_rows(self, packed):
+        # archive row of every packed genome, -1 when it is not archived
+        row_num = self.refresh()
+        rows = np.full(len(packed), -1, dtype=np.int64)
+        if row_num == 0 or len(packed) == 0:
+            return rows
+        capacity = int(self.index[1])
+        slots = get_slots(packed, capacity)
+        pending = np.arange(len(packed))
+        while len(pending) > 0:
+            candidate_rows = np.asarray(self.index[index_header_size + slots[pending]]) - 1
+            is_empty = candidate_rows < 0
+            # a slot past the committed rows belongs to a write in progress
+            is_match = ~is_empty & (candidate_rows < row_num)
+            is_match[is_match] = np.all(self.genomes[candidate_rows[is_match]] == packed[pending[is_match]], axis=1)
+            rows[pending[is_match]] = candidate_rows[is_match]
+            pending = pending[~(is_empty | is_match)]
+            slots[pending] = (slots[pending] + 1) & (capacity - 1)
+        return rows
+
+    def get_column_powers(self, raw_arrays):
+        # is_found of every raw_array, and the archived column powers of the found ones
+        rows = self.get_rows(np.packbits(raw_arrays, axis=1))
+        is_found = rows >= 0
+        return is_found, np.array(self.column_powers[rows[is_found]])
+
+    def append(self, raw_arrays, column_powers):
+        # archives the layouts not archived yet, returns how many were new
+        packed = np.packbits(raw_arrays, axis=1)
+        first_indexes = np.unique(packed.view(np.dtype((np.void, self.packed_width))).ravel(), return_index=True)[1]
+        packed = packed[first_indexes]
+        column_powers = np.asarray(column_powers, dtype=float)[first_indexes]
+        with self.get_lock():
+            is_new = self.get_rows(packed) < 0
+            row_num = int(self.index[0])
+            new_num = int(np.count_nonzero(is_new))
+            if new_num == 0:
+                return 0
+            # leftovers of an interrupted write are cut off before appending
+            for path, width, data in [(self.genomes_path, self.packed_width, packed[is_new]),
+                                      (self.column_powers_path, self.column_width * 8, column_powers[is_new])]:
+                with open(path, "r+b") as data_file:
+                    data_file.truncate(row_num * width)
+                    data_file.seek(row_num * width)
+                    data_file.write(np.ascontiguousarray(data).tobytes())
+            genomes = np.memmap(self.genomes_path, dtype=np.uint8, mode="r", shape=(row_num + new_num, self.packed_width))
+
+            capacity = int(self.index[1])
+            if row_num + new_num > capacity * max_load:
+                while row_num + new_num > capacity * max_load:
+                    capacity *= 2
+                self.write_index(genomes, np.arange(row_num + new_num), capacity)
+            else:
+                index = np.memmap(self.index_path, dtype=np.int64, mode="r+")
+                insert_rows(index[index_header_size:], genomes, np.arange(row_num, row_num + new_num))
+                index.flush()
+                index[0] = row_num + new_num
+                index.flush()
+            self.refresh()
+        return new_num
+
+    def get_chunks(self):
+        # (raw_arrays, column_powers) of every archived layout, chunk_size rows at a time
+        row_num = self.refresh()
+        for start in range(0, row_num, chunk_size):
+            stop = min(start + chunk_size, row_num)
+            yield np.unpackbits(self.genomes[start:stop], axis=1, count=self.cell_num), np.array(self.column_powers[start:stop])
@@ -0,0 +1,211 @@
+# -*- coding: utf-8 -*-
+
+import argparse
+import importlib
+import json
+import os
+import sys
+import time
+import tracemalloc
+import numpy as np
+import engine
+import sparse_layouts
+import wind_rose
+
+# Throughput benchmark of both models. Every case runs a model on a grid of its own parameters with fixed seeds,
+# measuring layouts evaluated per second, generations per second and peak traced memory. The powers and winners
+# of a case are deterministic, so they must match the baseline file exactly; the timings are only compared.
+
+baseline_file_name = "benchmark_baseline.json"
+grid_cases = [
+    ("Model_A", 7, 32),
+    ("Model_A", 22, 101),       # ten times the area of Model_A
+    ("Model_B", 50, 17),
+    ("Model_B", 158, 54)        # ten times the area of Model_B
+]
+population_sizes = [100, 1000, 5000]
+benchmark_generation_num = 10
+reference_layout_num = 40       # random layouts per grid checked against get_power_from_column_divided_array
+min_timing_sec = 0.5            # layout evaluation is repeated at least this long
+slowdown_tolerance = 0.8        # throughput under this ratio of the baseline is reported as a regression
+random_seed = 12345
+
+
+def get_case_engine(model_name, row_num, column_num, population_size):
+    # a fresh engine running the model's objective and settings on the case's grid
+    model = importlib.import_module(model_name)
+    config = model.config.get_changed(row_num=row_num, column_num=column_num, population_size=population_size, random_seed=random_seed,
+                                      wind_rose_bins=None, checkpoint_path=None)
+    return engine.Engine(config, model.objective)
+
+
+def get_random_layouts(config, size, seed):
+    # every turbine density from one turbine to a full grid is represented
+    rng = np.random.default_rng(seed)
+    turbine_nums = np.linspace(1, config.cell_num, size).astype(np.int64)
+    return np.array([rng.permutation(np.arange(config.cell_num) < turbine_num) for turbine_num in turbine_nums], dtype=np.uint8)
+
+
+def get_reference_mismatches(model_engine, raw_arrays):
+    # optimized evaluators against the original reference implementation, compared exactly
+    config = model_engine.config
+    table = model_engine.column_power_table
+    numpy_table = engine.get_column_power_table(config.get_changed(wake_backend="numpy"))
+    layouts = raw_arrays.reshape(len(raw_arrays), config.column_num, config.row_num)
+    reference_powers = [model_engine.get_power_from_column_divided_array(model_engine.get_column_divided_array_from_raw_array(raw_array.tolist()))
+                        for raw_array in raw_arrays]
+    memo_powers = [round(sum(table.get_column_powers(layout).tolist()), 4) for layout in layouts]
+    zero_direction_rose = wind_rose.WindRoseEvaluator(config.row_num, config.column_num, config.rotor_diameter, config.grid_size_ver,
+                                                      config.grid_size_hor, config.entrainment_constant, config.axial_ind_factor,
+                                                      config.cut_in_wind_speed, config.air_density, config.power_coefficient,
+                                                      [(0, config.avg_wind_speed, 1.0)])
+    parent_column_powers = table.get_batch_column_powers(layouts)
+    child_layouts = layouts.copy()
+    child_layouts[0::2, :config.column_num // 2] = layouts[1::2, :config.column_num // 2]
+    child_layouts[1::2, :config.column_num // 2] = layouts[0::2, :config.column_num // 2]
+    child_layouts[:, -1, 0] ^= 1
+    mate_indexes = np.arange(len(layouts)) ^ 1
+    offspring_powers = table.get_total_powers(table.get_offspring_column_powers(layouts, parent_column_powers, layouts[mate_indexes],
+                                                                               parent_column_powers[mate_indexes], child_layouts))
+    child_reference_powers = [model_engine.get_power_from_column_divided_array(layout.tolist()) for layout in child_layouts]
+    evaluator_powers = {
+        "get_layout_powers": table.get_layout_powers(layouts).tolist(),
+        "get_wake_column_powers": table.get_total_powers(table.get_wake_column_powers(layouts)).tolist(),
+        "numpy_wake_column_powers": table.get_total_powers(numpy_table.get_wake_column_powers(layouts)).tolist(),
+        "get_column_powers": memo_powers,
+        "get_layout_power": [table.get_layout_power(raw_array) for raw_array in raw_arrays],
+        "wind_rose": [round(power, 4) for power in zero_direction_rose.get_layout_powers(raw_arrays).tolist()],
+        "sparse_layouts": [table.get_total_powers(sparse_layouts.get_column_powers(table, sparse_layouts.get_cells(raw_array[None])))[0]
+                           for raw_array in raw_arrays]
+    }
+    mismatches = {name: sum(1 for power, reference_power in zip(powers, reference_powers) if power != reference_power)
+                  for name, powers in evaluator_powers.items()}
+    mismatches["get_offspring_column_powers"] = sum(1 for power, reference_power in zip(offspring_powers.tolist(), child_reference_powers)
+                                                    if power != reference_power)
+    return mismatches
+
+
+def get_layouts_per_sec(model_engine, raw_arrays):
+    table = model_engine.column_power_table
+    layouts = raw_arrays.reshape(len(raw_arrays), model_engine.config.column_num, model_engine.config.row_num)
+    repeat_num = 0
+    start = time.perf_counter()
+    while True:
+        table.get_total_powers(table.get_batch_column_powers(layouts))
+        repeat_num += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_timing_sec:
+            return repeat_num * len(layouts) / elapsed
+
+
+def run_generations(model_engine):
+    generation = model_engine.get_generation(None)
+    for i in range(benchmark_generation_num):
+        generation = model_engine.get_generation(generation)
+    return generation
+
+
+def run_case(model_name, row_num, column_num, population_size):
+    model_engine = get_case_engine(model_name, row_num, column_num, population_size)
+    raw_arrays = model_engine.get_random_raw_arrays(population_size)
+    layouts_per_sec = get_layouts_per_sec(model_engine, raw_arrays)
+    power_checksum = round(float(np.sum(model_engine.get_population_from_raw_arrays(raw_arrays).power)), 4)
+
+    model_engine = get_case_engine(model_name, row_num, column_num, population_size)
+    start = time.perf_counter()
+    generation = run_generations(model_engine)
+    generations_per_sec = (benchmark_generation_num + 1) / (time.perf_counter() - start)
+    winner_lay = generation.get_layout(generation.get_best_index())
+
+    model_engine = get_case_engine(model_name, row_num, column_num, population_size)
+    tracemalloc.start()
+    run_generations(model_engine)
+    peak_memory = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {
+        "model": model_name,
+        "row_num": row_num,
+        "column_num": column_num,
+        "population_size": population_size,
+        "layouts_per_sec": layouts_per_sec,
+        "generations_per_sec": generations_per_sec,
+        "peak_memory_mb": peak_memory / (1024 * 1024),
+        "power_checksum": power_checksum,
+        "winner_fitness": float(winner_lay["fitness"])
+    }
+
+
+def get_case_key(result):
+    return result["model"] + " " + str(result["row_num"]) + "x" + str(result["column_num"]) + " pop " + str(result["population_size"])
+
+
+def compare_with_baseline(results, baseline_results):
+    # returns the messages of every difference, timings only count when they fall under slowdown_tolerance
+    baseline_by_key = {get_case_key(result): result for result in baseline_results}
+    messages = []
+    for result in results:
+        baseline = baseline_by_key.get(get_case_key(result))
+        if baseline is None:
+            messages.append(get_case_key(result) + ": not in the baseline")
+            continue
+        for name in ["power_checksum", "winner_fitness"]:
+            if result[name] != baseline[name]:
+                messages.append(get_case_key(result) + ": " + name + " " + str(result[name]) + " != baseline " + str(baseline[name]))
+        for name in ["layouts_per_sec", "generations_per_sec"]:
+            if result[name] < slowdown_tolerance * baseline[name]:
+                messages.append(get_case_key(result) + ": " + name + " fell to " + str(round(result[name] / baseline[name], 2)) + " x baseline")
+    return messages
+
+
+def print_results(results, baseline_results):
+    baseline_by_key = {get_case_key(result): result for result in baseline_results}
+    print("case".ljust(30) + "layouts/s".rjust(14) + "gens/s".rjust(10) + "peak MB".rjust(10) + "vs baseline".rjust(16))
+    for result in results:
+        baseline = baseline_by_key.get(get_case_key(result))
+        ratios = "-"
+        if baseline is not None:
+            ratios = "%.2f / %.2f" % (result["layouts_per_sec"] / baseline["layouts_per_sec"], result["generations_per_sec"] / baseline["generations_per_sec"])
+        print(get_case_key(result).ljust(30) + ("%.0f" % result["layouts_per_sec"]).rjust(14) + ("%.2f" % result["generations_per_sec"]).rjust(10)
+              + ("%.1f" % result["peak_memory_mb"]).rjust(10) + ratios.rjust(16))
+
+
+def start_benchmark(is_quick, is_baseline_saved):
+    cases = grid_cases[0::2] if is_quick else grid_cases
+    sizes = population_sizes[:2] if is_quick else population_sizes
+
+    failure_messages = []
+    for model_name, row_num, column_num in cases:
+        model_engine = get_case_engine(model_name, row_num, column_num, sizes[0])
+        mismatches = get_reference_mismatches(model_engine, get_random_layouts(model_engine.config, reference_layout_num, random_seed))
+        print(model_name + " " + str(row_num) + "x" + str(column_num) + " reference mismatches : " + str(mismatches))
+        failure_messages += [model_name + " " + str(row_num) + "x" + str(column_num) + ": " + name + " differs from the reference on "
+                             + str(count) + " layouts" for name, count in mismatches.items() if count > 0]
+
+    results = [run_case(model_name, row_num, column_num, population_size)
+               for model_name, row_num, column_num in cases for population_size in sizes]
+
+    baseline_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), baseline_file_name)
+    baseline_results = []
+    if os.path.exists(baseline_path):
+        with open(baseline_path) as baseline_file:
+            baseline_results = json.load(baseline_file)
+    print_results(results, baseline_results)
+    if is_baseline_saved:
+        with open(baseline_path, "w") as baseline_file:
+            json.dump(results, baseline_file, indent=1)
+        print("Baseline saved to " + baseline_path)
+    elif len(baseline_results) > 0:
+        failure_messages += compare_with_baseline(results, baseline_results)
+
+    for message in failure_messages:
+        print("FAIL " + message)
+    return len(failure_messages) == 0
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Evaluation throughput benchmark of Model_A and Model_B")
+    parser.add_argument("--quick", action="store_true", help="original grids and the two smaller populations only")
+    parser.add_argument("--save-baseline", action="store_true", help="overwrite " + baseline_file_name + " with this run")
+    args = parser.parse_args()
+    sys.exit(0 if start_benchmark(args.quick, args.save_baseline) else 1)
@@ -0,0 +1,96 @@
+# -*- coding: utf-8 -*-
+
+import itertools
+import math
+import numpy as np
+
+exact_combination_limit = 250000    # tall columns are enumerated exactly while C(row_num, k) stays below this
+power_tolerance = 1e-4              # layout powers are rounded to 4 digits
+ratio_tolerance = 1e-9              # relative, for cost / power ratios of rounded powers
+
+
+def get_turbine_power(column_power_table, speed):
+    if speed < column_power_table.cut_in_wind_speed:
+        return 0.0
+    return column_power_table.power_constant * (speed ** 3) / 1000
+
+
+def get_relaxed_column_best_powers(column_power_table):
+    # Upper bound on the best column power for every turbine count. A turbine never sees more than
+    # avg_wind_speed reduced by the wake of its nearest upstream turbine alone, which is exact for k <= 2.
+    row_num = column_power_table.row_num
+    avg_wind_speed = column_power_table.avg_wind_speed
+    gap_powers = np.array([0.0] + [get_turbine_power(column_power_table, avg_wind_speed * column_power_table.wake_factors[gap])
+                                   for gap in range(1, row_num)])
+    last_row_powers = np.full((row_num + 1, row_num), -np.inf)     # [k, row of the last turbine]
+    last_row_powers[1] = get_turbine_power(column_power_table, avg_wind_speed)
+    for k in range(2, row_num + 1):
+        for row in range(k - 1, row_num):
+            last_row_powers[k, row] = np.max(last_row_powers[k - 1, :row] + gap_powers[row - np.arange(row)])
+    best_powers = np.max(last_row_powers, axis=1)
+    best_powers[0] = 0.0
+    return best_powers
+
+
+def get_column_best_powers(column_power_table):
+    # best_powers[k] is the exact best power of one column holding k turbines, or an upper bound on it
+    # when is_exact[k] is False. They only depend on the wake geometry, so the table keeps them.
+    if column_power_table.column_best_powers is None:
+        column_power_table.column_best_powers = get_new_column_best_powers(column_power_table)
+    return column_power_table.column_best_powers
+
+
+def get_new_column_best_powers(column_power_table):
+    row_num = column_power_table.row_num
+    if column_power_table.dense_table is not None:
+        turbine_counts = np.array([bin(pattern).count("1") for pattern in range(2 ** row_num)])
+        best_powers = np.array([column_power_table.dense_table[turbine_counts == k].max() for k in range(row_num + 1)])
+        return best_powers, np.ones(row_num + 1, dtype=bool)
+
+    best_powers = get_relaxed_column_best_powers(column_power_table)
+    is_exact = np.zeros(row_num + 1, dtype=bool)
+    is_exact[:3] = True
+    for k in range(3, row_num + 1):
+        if math.comb(row_num, k) > exact_combination_limit:
+            break
+        rows = np.array(list(itertools.combinations(range(row_num), k)))
+        columns = np.zeros((len(rows), row_num), dtype=np.uint8)
+        columns[np.arange(len(rows))[:, None], rows] = 1
+        best_powers[k] = column_power_table.get_wake_column_powers(columns).max()
+        is_exact[k] = True
+    return best_powers, is_exact
+
+
+def get_layout_best_powers(column_power_table, max_turbine_num=None):
+    # Columns are independent, so the best layout with n turbines is a max-plus knapsack over the columns.
+    # It stops at max_turbine_num turbines when given, which keeps large grids cheap.
+    column_best_powers = get_column_best_powers(column_power_table)[0]
+    cell_num = column_power_table.row_num * column_power_table.column_num
+    if max_turbine_num is not None:
+        cell_num = min(cell_num, max_turbine_num)
+    layout_best_powers = np.full(cell_num + 1, -np.inf)
+    layout_best_powers[0] = 0.0
+    for column_index in range(column_power_table.column_num):
+        next_best_powers = np.full(cell_num + 1, -np.inf)
+        for k in range(min(column_power_table.row_num, cell_num) + 1):
+            next_best_powers[k:] = np.maximum(next_best_powers[k:], layout_best_powers[:cell_num + 1 - k] + column_best_powers[k])
+        layout_best_powers = next_best_powers
+    return layout_best_powers
+
+
+def get_fixed_count_power_bound(column_power_table, turbine_num):
+    return float(get_layout_best_powers(column_power_table, turbine_num)[turbine_num])
+
+
+def get_min_cost_power_ratio(layout_best_powers, get_cost):
+    # lowest cost / power reachable with any turbine count, layout_best_powers[n] bounding the power of n turbines
+    ratios = [get_cost(n) / layout_best_powers[n] for n in range(1, len(layout_best_powers)) if layout_best_powers[n] > 0]
+    return min(ratios)
+
+
+def is_power_within_gap(power, power_bound, gap):
+    return power >= (1 - gap) * power_bound - power_tolerance
+
+
+def is_ratio_within_gap(ratio, ratio_bound, gap):
+    return ratio <= (1 + gap) * ratio_bound * (1 + ratio_tolerance)
@@ -0,0 +1,60 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+import numpy as np
+import population
+
+# A checkpoint is one uncompressed .npz holding the bit-packed genomes and the parallel arrays of a population,
+# the RNG state, the generation counter and the winner history, plus the local search state: the genome keys it
+# already searched (see diversity.py) and its counters. It is written next to its final path and renamed over it,
+# so a crash while saving leaves the previous checkpoint intact.
+
+
+def save_checkpoint(path, generation, rng, evolve_num, winner_layouts_powers_list, local_search_keys=(), local_search_evaluations=0,
+                    local_search_improved_num=0):
+    packed_generation = generation.get_packed()
+    arrays = {
+        "genomes": packed_generation.genomes,
+        "power": packed_generation.power,
+        "fitness": packed_generation.fitness,
+        "cost": packed_generation.cost,
+        "turbine_num": packed_generation.turbine_num,
+        "cell_num": np.array(packed_generation.cell_num),
+        "reverse": np.array(packed_generation.reverse),
+        "rng_state": np.array(json.dumps(rng.bit_generator.state)),
+        "evolve_num": np.array(evolve_num),
+        "winner_layouts_powers_list": np.array(winner_layouts_powers_list, dtype=float),
+        "local_search_keys": np.array([np.frombuffer(key, dtype=np.uint8) for key in sorted(local_search_keys)], dtype=np.uint8),
+        "local_search_evaluations": np.array(local_search_evaluations),
+        "local_search_improved_num": np.array(local_search_improved_num)
+    }
+    if packed_generation.column_powers is not None:
+        arrays["column_powers"] = packed_generation.column_powers
+
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as checkpoint_file:
+        np.savez(checkpoint_file, **arrays)
+        checkpoint_file.flush()
+        os.fsync(checkpoint_file.fileno())
+    os.replace(temp_path, path)
+
+
+def load_checkpoint(path, cell_num):
+    with np.load(path, allow_pickle=False) as data:
+        if int(data["cell_num"]) != cell_num:
+            raise ValueError(path + " holds layouts of " + str(int(data["cell_num"])) + " cells, not " + str(cell_num))
+        column_powers = data["column_powers"] if "column_powers" in data.files else None
+        saved_generation = population.Population(data["genomes"], data["power"], data["fitness"], data["cost"], data["turbine_num"],
+                                                 bool(data["reverse"]), packed=True, cell_num=cell_num, column_powers=column_powers)
+        # checkpoints written before the local search state was saved resume with an empty one
+        is_local_search_saved = "local_search_keys" in data.files
+        return {
+            "population": saved_generation.get_unpacked(),
+            "rng_state": json.loads(str(data["rng_state"])),
+            "evolve_num": int(data["evolve_num"]),
+            "winner_layouts_powers_list": data["winner_layouts_powers_list"].tolist(),
+            "local_search_keys": set(key.tobytes() for key in data["local_search_keys"]) if is_local_search_saved else set(),
+            "local_search_evaluations": int(data["local_search_evaluations"]) if is_local_search_saved else 0,
+            "local_search_improved_num": int(data["local_search_improved_num"]) if is_local_search_saved else 0
+        }
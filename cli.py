@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+
+import time
+cli_start_time = time.perf_counter()
+
+import argparse
+import importlib
+import json
+import sys
+import engine
+
+# Headless entry point: python cli.py Model_B --population_size 200 --turbine_num 25 --json
+# Every Config setting has an option of the same name, any objective attribute can be given with --set,
+# and --config reads a JSON object of either kind. Options win over the config file, which wins over the model.
+# Nothing is plotted unless --plot is given, matplotlib is only imported then.
+
+
+def get_value(text):
+    # numbers, booleans, null and lists are read as JSON, anything else stays a string
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(description="Runs a model headless and reports its winner layout")
+    parser.add_argument("model", help="module declaring config and objective, Model_A or Model_B")
+    parser.add_argument("--config", help="JSON file of settings and objective attributes")
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=VALUE", help="any setting or objective attribute, may repeat")
+    parser.add_argument("--turbine_num", type=int, help="turbine count of a fixed count objective")
+    parser.add_argument("--json", action="store_true", help="print the winner as one JSON object instead of the report")
+    parser.add_argument("--plot", action="store_true", help="plot the winners list at the end")
+    for name in engine.required_setting_names + list(engine.default_settings):
+        if name != "grid_rounding":
+            parser.add_argument("--" + name, type=get_value, metavar="VALUE")
+    return parser
+
+
+def get_changes(args):
+    changes = {}
+    if args.config is not None:
+        with open(args.config) as config_file:
+            changes.update(json.load(config_file))
+    for name in engine.required_setting_names + list(engine.default_settings) + ["turbine_num"]:
+        if getattr(args, name, None) is not None:
+            changes[name] = getattr(args, name)
+    for assignment in args.set:
+        name, value = assignment.split("=", 1)
+        changes[name] = get_value(value)
+    changes["show_plot"] = args.plot
+    return changes
+
+
+def get_winner_json(model_name, model_engine, result):
+    winner_lay = result["winner_lay"]
+    return {
+        "model": model_name,
+        "evolve_num": result["evolve_num"],
+        "fitness": winner_lay["fitness"],
+        "power": winner_lay["power"],
+        "cost": winner_lay["cost"] if model_engine.objective.has_cost else None,
+        "turbine_num": winner_lay["turbine_num"],
+        "bound": model_engine.get_bound(),
+        "row_num": model_engine.config.row_num,
+        "column_num": model_engine.config.column_num,
+        "raw_array": winner_lay["raw_array"].tolist(),
+        "startup_sec": model_engine.first_generation_time - cli_start_time,
+        "execution_time": time.perf_counter() - cli_start_time
+    }
+
+
+def main(argv):
+    args = get_parser().parse_args(argv)
+    model = importlib.import_module(args.model)
+    config, objective = engine.get_changed_model(model.config, model.objective, get_changes(args))
+    model_engine = engine.Engine(config, objective)
+    if not model_engine.is_static_values_valid():
+        return 2
+    if args.json:
+        result = model_engine.run_evolution()
+        print(json.dumps(get_winner_json(args.model, model_engine, result)))
+    else:
+        model_engine.start_evolution()
+        print("Startup in sec       : " + str(model_engine.first_generation_time - cli_start_time))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
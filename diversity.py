@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+# Genomes are told apart by the bytes of their bit-packed raw_array, or of their cells when sparse (see sparse_layouts.py).
+# The fitness cache uses the same keys.
+
+
+def get_genome_keys(genomes):
+    # raw_arrays are uint8, sparse genomes hold wider cell indexes
+    if genomes.dtype != np.uint8:
+        return [cells.tobytes() for cells in genomes]
+    return [packed.tobytes() for packed in np.packbits(genomes, axis=1)]
+
+
+def get_duplicate_rows(genomes, rows, seen_keys):
+    # rows whose genome is already in seen_keys; the others are added to it in order, so a repeat within rows counts too
+    duplicate_rows = []
+    for row, key in zip(rows.tolist(), get_genome_keys(genomes[rows])):
+        if key in seen_keys:
+            duplicate_rows.append(row)
+        else:
+            seen_keys.add(key)
+    return np.array(duplicate_rows, dtype=np.int64)
+
+
+def get_diversity_stats(genomes, cell_num):
+    # The mean Hamming distance between two distinct layouts follows from the per-cell turbine frequencies,
+    # without comparing the pairs. diversity is that distance over cell_num.
+    size = len(genomes)
+    mean_hamming_distance = 0.0
+    if size > 1:
+        if genomes.dtype != np.uint8:
+            cell_frequencies = np.bincount(genomes.ravel(), minlength=cell_num) / size
+        else:
+            cell_frequencies = genomes.mean(axis=0)
+        mean_hamming_distance = float(np.sum(2 * cell_frequencies * (1 - cell_frequencies))) * size / (size - 1)
+    return {
+        "unique_num": len(set(get_genome_keys(genomes))),
+        "mean_hamming_distance": mean_hamming_distance,
+        "diversity": mean_hamming_distance / cell_num
+    }
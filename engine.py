@@ -0,0 +1,644 @@
+# -*- coding: utf-8 -*-
+
+import copy
+import math
+import os
+import sys
+import time
+import numpy as np
+import wake
+import operators
+import population
+import fitness_cache
+import profiler
+import checkpoint
+import telemetry
+import diversity
+import local_search
+import sparse_layouts
+import wind_rose
+
+default_settings = {
+    "population_size": 1000,
+    "generation_num": 3000,
+    "er": 0.1,
+    "cr": 0.4,
+    "random_seed": None,                            # any int makes runs reproducible
+    "cut_power_coefficient": 0.99999,
+    "optimality_gap": 0.0,                          # stop once the winner is this close to the proven optimum, 0 means only at the optimum
+    "grid_rounding": round,                         # turns the farm size in cells into row_num and column_num
+    "row_num": None,                                # None follows from wind_farm_size_ver
+    "column_num": None,                             # None follows from wind_farm_size_hor
+    "wind_rose_bins": None,                         # [(direction in degrees from the column axis, wind speed in m/s, probability), ...], None keeps the single avg_wind_speed direction
+    "fitness_cache_max_bytes": 256 * 1024 * 1024,   # 0 turns the fitness cache off
+    "show_phase_summary": False,                    # prints where the run's time went, phase_profiler.generation_records keeps it per generation
+    "checkpoint_path": None,                        # .npz file saved every checkpoint_interval generations and resumed when it exists, None turns it off
+    "checkpoint_interval": 10,                      # in generations
+    "telemetry_path": None,                         # .jsonl or .csv file getting one record per generation, None turns it off
+    "telemetry_buffer_size": 50,                    # records held before they are written
+    "show_plot": True,                              # plots the winners list at the end, plot_telemetry.py does it offline
+    "deduplicate": False,                           # new layouts repeating one of the generation are mutated again or replaced
+    "deduplicate_mutation_rounds": 3,               # mutations a duplicate gets before a random layout replaces it
+    "local_search_top_k": 0,                        # best layouts refined by local search, 0 turns it off
+    "local_search_interval": 1,                     # in generations
+    "local_search_budget": 50000,                   # columns the local search may evaluate per generation, a layout has column_num of them,
+                                                    # it must cover one neighbourhood setup, row_num * column_num flips plus the moves within columns
+    "sparse_genomes": False,                        # genomes hold the sorted turbine cells (see sparse_layouts.py), for fixed turbine counts on large grids
+    "wake_backend": None,                           # "numpy" or "numba" (see wake.py), None takes numba when it is installed
+    "archive_path": None,                           # directory of the layout archive shared by runs and processes (see archive.py), None turns it off
+    "archive_warm_start_rate": 0.1,                 # share of the first generation taken from the archive's best layouts
+    "archive_store_rate": 0.1                       # share of every generation, best first, written to the archive, 1.0 writes all of it
+}
+required_setting_names = ["rotor_diameter", "grid_size_ver", "grid_size_hor", "wind_farm_size_hor", "wind_farm_size_ver", "entrainment_constant",
+                          "thrust_coefficient", "cut_in_wind_speed", "rated_wind_speed", "avg_wind_speed", "air_density", "power_coefficient"]
+
+
+class Config:
+    # Settings of one run, read as attributes, plus the values derived from them.
+    # get_changed returns a new Config with some settings replaced.
+
+    def __init__(self, **settings):
+        missing_names = [name for name in required_setting_names if name not in settings]
+        unknown_names = [name for name in settings if name not in default_settings and name not in required_setting_names]
+        if len(missing_names) > 0 or len(unknown_names) > 0:
+            raise TypeError("missing settings: " + str(missing_names) + ", unknown settings: " + str(unknown_names))
+        self.settings = dict(default_settings, **settings)
+        for name, value in self.settings.items():
+            setattr(self, name, value)
+
+        if self.row_num is None:
+            self.row_num = self.grid_rounding(self.wind_farm_size_ver / (self.grid_size_ver * self.rotor_diameter))
+        if self.column_num is None:
+            self.column_num = self.grid_rounding(self.wind_farm_size_hor / (self.grid_size_hor * self.rotor_diameter))
+        self.cell_num = self.row_num * self.column_num
+        self.axial_ind_factor = 0.5 * (1 - (1 - self.thrust_coefficient) ** 0.5)
+        self.turbine_power = 0.5 * self.power_coefficient * self.air_density * math.pi * ((self.rotor_diameter ** 2) / 4) * (self.avg_wind_speed ** 3) / 1000  # in kW
+
+    def get_changed(self, **changes):
+        return Config(**dict(self.settings, **changes))
+
+
+def get_changed_model(config, objective, changes):
+    # changes name Config settings or attributes of the objective, like turbine_num
+    settings = {}
+    objective = copy.copy(objective)
+    for name, value in changes.items():
+        if name in default_settings or name in required_setting_names:
+            settings[name] = value
+        elif hasattr(objective, name):
+            setattr(objective, name, value)
+        else:
+            raise ValueError("unknown parameter: " + name)
+    return config.get_changed(**settings), objective
+
+
+def print_list(listo):
+    print("========")
+    for i in listo:
+        print(i)
+    print("========")
+
+
+def is_value_between(val, minn, maxx):
+    return val <= minn or val >= maxx
+
+
+def get_child_seeds(seed, size):
+    # independent seeds for "size" runs spawned from one seed, as islands and sweep points use them
+    return [int(child.generate_state(1)[0]) for child in np.random.SeedSequence(seed).spawn(size)]
+
+
+def get_column_power_table(config, dense_table=None):
+    return wake.ColumnPowerTable(config.row_num, config.column_num, config.rotor_diameter, config.grid_size_ver, config.entrainment_constant,
+                                 config.axial_ind_factor, config.cut_in_wind_speed, config.avg_wind_speed, config.air_density,
+                                 config.power_coefficient, dense_table, config.wake_backend)
+
+
+class Engine:
+    # One run of the genetic algorithm for a Config and an objective (see objectives.py).
+    # Everything a run changes, its RNG, fitness cache and phase records, lives on the engine.
+    # column_power_table may be passed in when one was built for the same wake geometry and grid.
+    # With sparse_genomes the raw_arrays its methods pass around are sparse genomes.
+
+    def __init__(self, config, objective, column_power_table=None):
+        self.config = config
+        self.objective = objective
+        self.column_power_table = column_power_table
+        if column_power_table is None:
+            self.column_power_table = get_column_power_table(config)
+        self.wind_rose_evaluator = None
+        if config.wind_rose_bins is not None:
+            self.wind_rose_evaluator = wind_rose.WindRoseEvaluator(config.row_num, config.column_num, config.rotor_diameter, config.grid_size_ver,
+                                                                   config.grid_size_hor, config.entrainment_constant, config.axial_ind_factor,
+                                                                   config.cut_in_wind_speed, config.air_density, config.power_coefficient,
+                                                                   config.wind_rose_bins)
+        self.layout_fitness_cache = fitness_cache.FitnessCache(config.fitness_cache_max_bytes)
+        self.rng = np.random.default_rng(config.random_seed)
+        self.phase_profiler = profiler.PhaseProfiler()
+        self.bound = None
+        self.start_time = time.time()
+        self.first_generation_time = None      # time.perf_counter() when the first generation was ready
+        self.generation_duplicate_num = 0       # duplicates replaced in the current generation
+        self.duplicate_num = 0
+        self.generation_index = 0               # index of the next generation get_generation builds
+        self.local_search_keys = set()          # genome keys of the searches that reached a local optimum, where they started and ended
+        self.generation_local_search_evaluations = 0
+        self.local_search_evaluations = 0
+        self.local_search_improved_num = 0
+        self.objective_state = None             # kept by the objective for this run, see objectives.py
+        self.layout_archive = None
+        if config.archive_path is not None and not config.sparse_genomes:
+            # archive.py needs fcntl, imported only here so the engine still loads where there is none
+            import archive
+            column_width = config.column_num if config.wind_rose_bins is None else 1
+            self.layout_archive = archive.LayoutArchive(config.archive_path, config, column_width)
+        self.generation_archive_hits = 0        # evaluations the archive answered in the current generation
+        self.archive_hits = 0
+
+    def get_warning_msgs(self):
+        config = self.config
+        warning_msg_list = []
+        if config.population_size < 10:
+            msg = "population_size, 10 dan küçük olamaz."
+            warning_msg_list.append(msg)
+        if config.population_size % 10 != 0:
+            msg = "population_size, 10 nun katı olmalı."
+            warning_msg_list.append(msg)
+        if config.generation_num < 3:
+            msg = "generation_num, 3 den küçük olamaz."
+            warning_msg_list.append(msg)
+        if is_value_between(config.cut_power_coefficient, 0, 1):
+            msg = "cut_power_coefficient 0 ile 1 arasında olmalı."
+            warning_msg_list.append(msg)
+        if config.optimality_gap < 0 or config.optimality_gap >= 1:
+            msg = "optimality_gap 0 ile 1 arasında olmalı."
+            warning_msg_list.append(msg)
+        if is_value_between(config.er, 0, 1):
+            msg = "er 0 ile 1 arasında olmalı."
+            warning_msg_list.append(msg)
+        if is_value_between(config.cr, 0, 1):
+            msg = "cr 0 ile 1 arasında olmalı."
+            warning_msg_list.append(msg)
+        if is_value_between(config.er + config.cr, 0, 1):
+            msg = "er + cr 0 ile 1 arasında olmalı."
+            warning_msg_list.append(msg)
+        if config.local_search_top_k < 0 or config.local_search_top_k > config.population_size:
+            msg = "local_search_top_k 0 ile population_size arasında olmalı."
+            warning_msg_list.append(msg)
+        if config.local_search_interval < 1:
+            msg = "local_search_interval, 1 den küçük olamaz."
+            warning_msg_list.append(msg)
+        if config.local_search_top_k > 0 and config.wind_rose_bins is not None:
+            msg = "local_search_top_k, wind_rose_bins ile kullanılamaz."
+            warning_msg_list.append(msg)
+        if config.sparse_genomes and not self.objective.is_turbine_num_fixed:
+            msg = "sparse_genomes sadece sabit türbin sayısı ile kullanılabilir."
+            warning_msg_list.append(msg)
+        if config.sparse_genomes and (config.wind_rose_bins is not None or config.local_search_top_k > 0):
+            msg = "sparse_genomes, wind_rose_bins ve local_search_top_k ile kullanılamaz."
+            warning_msg_list.append(msg)
+        if config.wake_backend is not None and config.wake_backend not in wake.wake_backend_names:
+            msg = "wake_backend None, numpy ya da numba olmalı."
+            warning_msg_list.append(msg)
+        if config.wake_backend == "numba" and wake.get_wake_kernels("numba") is None:
+            msg = "wake_backend numba için numba kurulu olmalı."
+            warning_msg_list.append(msg)
+        if config.archive_path is not None and config.sparse_genomes:
+            msg = "archive_path, sparse_genomes ile kullanılamaz."
+            warning_msg_list.append(msg)
+        if config.archive_warm_start_rate < 0 or config.archive_warm_start_rate > 1:
+            msg = "archive_warm_start_rate 0 ile 1 arasında olmalı."
+            warning_msg_list.append(msg)
+        if config.archive_store_rate < 0 or config.archive_store_rate > 1:
+            msg = "archive_store_rate 0 ile 1 arasında olmalı."
+            warning_msg_list.append(msg)
+        warning_msg_list += self.objective.get_warning_msgs(config)
+        return warning_msg_list
+
+    def is_static_values_valid(self):
+        warning_msg_list = self.get_warning_msgs()
+        is_valid_values = len(warning_msg_list) == 0
+        if not is_valid_values:
+            print("----- WARNING -----")
+            print_list(warning_msg_list)
+            print("----- WARNING -----")
+        return is_valid_values
+
+    def get_random_raw_arrays(self, size):
+        with self.phase_profiler.phase("random"):
+            if self.config.sparse_genomes:
+                # the turbine count is fixed, it is read from one layout as a size of 0 has none
+                turbine_num = int(self.objective.get_turbine_nums(self, 1)[0])
+                return sparse_layouts.get_random_cells(size, self.config.cell_num, turbine_num, self.rng)
+            return operators.get_random_raw_arrays(size, self.config.cell_num, self.objective.get_turbine_nums(self, size), self.rng)
+
+    def make_crossover(self, raw_arrays):
+        if self.config.sparse_genomes:
+            self.objective.make_sparse_crossover(raw_arrays, self.config.cell_num, self.rng)
+        else:
+            self.objective.make_crossover(raw_arrays, self.rng)
+
+    def make_mutation(self, raw_arrays):
+        if self.config.sparse_genomes:
+            self.objective.make_sparse_mutation(raw_arrays, self.config.cell_num, self.rng)
+        else:
+            self.objective.make_mutation(raw_arrays, self.rng)
+
+    def get_column_divided_array_from_raw_array(self, raw_array):
+        row_num = self.config.row_num
+        column_divided_array = []
+        sub_array = []
+        for cellIndex in range(len(raw_array)):
+            sub_array.append(raw_array[cellIndex])
+            if cellIndex % row_num == row_num - 1:
+                column_divided_array.append(sub_array)
+                sub_array = []
+        return column_divided_array
+
+    def get_power_from_column_divided_array(self, column_divided_array):
+        # the original evaluator, kept as the reference the batched ones are checked against
+        c = self.config
+        total_power = 0
+        for column in column_divided_array:
+            wind_speed = []
+            for cellIndex in range(len(column)):
+                counter = 1
+                if column[cellIndex] == 1 and len(wind_speed) == 0:
+                    wind_speed.append(c.avg_wind_speed)
+                elif column[cellIndex] == 1 and len(wind_speed) > 0:
+                    for row_number in range(cellIndex):
+                        if cellIndex > 0 and column[cellIndex - row_number - 1] == 1:
+                            reduced_speed = wind_speed[len(wind_speed)-1] * (1 - 2 * c.axial_ind_factor * ((c.rotor_diameter / 2) / (c.rotor_diameter / 2 + c.entrainment_constant * c.grid_size_ver * c.rotor_diameter * counter)) ** 2)
+                            if reduced_speed < c.cut_in_wind_speed:
+                                reduced_speed = 0
+                            wind_speed.append(reduced_speed)
+                            break
+                        else:
+                            counter += 1
+
+            for i in range(len(wind_speed)):
+                total_power = total_power + 0.5 * c.power_coefficient * c.air_density * math.pi * ((c.rotor_diameter ** 2) / 4) * (wind_speed[i] ** 3) / 1000
+        return round(total_power, 4)
+
+    def get_layout_column_powers(self, layouts):
+        # under a wind rose the columns are no longer independent, so the whole layout counts as a single column
+        if self.wind_rose_evaluator is not None:
+            return self.wind_rose_evaluator.get_layout_powers(layouts)[:, None]
+        return self.column_power_table.get_batch_column_powers(layouts)
+
+    def get_population_from_raw_arrays(self, raw_arrays):
+        if self.config.sparse_genomes:
+            return self.get_population_from_cells(raw_arrays)
+        raw_arrays = np.reshape(raw_arrays, (len(raw_arrays), self.config.cell_num)).astype(np.uint8, copy=False)
+        layouts = raw_arrays.reshape(len(raw_arrays), self.config.column_num, self.config.row_num)
+
+        def evaluate(indexes):
+            return self.get_layout_column_powers(layouts[indexes])
+
+        with self.phase_profiler.phase("evaluation"):
+            return self.objective.get_population(self, raw_arrays, self.get_column_powers(raw_arrays, evaluate))
+
+    def get_population_from_cells(self, cells):
+        def evaluate(indexes):
+            return sparse_layouts.get_column_powers(self.column_power_table, cells[indexes])
+
+        with self.phase_profiler.phase("evaluation"):
+            return self.objective.get_population(self, cells, self.layout_fitness_cache.get_column_powers(cells, evaluate))
+
+    def get_offspring_population(self, parents, raw_arrays):
+        # raw_arrays[i] was bred from parents i and i ^ 1, so only the columns it shares with neither are re-evaluated
+        mate_indexes = np.arange(len(parents)) ^ 1
+        parent_layouts = parents.get_raw_arrays().reshape(len(parents), self.config.column_num, self.config.row_num)
+        child_layouts = raw_arrays.reshape(len(parents), self.config.column_num, self.config.row_num)
+
+        def evaluate(indexes):
+            if self.wind_rose_evaluator is not None:
+                return self.get_layout_column_powers(child_layouts[indexes])
+            return self.column_power_table.get_offspring_column_powers(
+                parent_layouts[indexes], parents.column_powers[indexes],
+                parent_layouts[mate_indexes[indexes]], parents.column_powers[mate_indexes[indexes]], child_layouts[indexes])
+
+        with self.phase_profiler.phase("evaluation"):
+            return self.objective.get_population(self, raw_arrays, self.get_column_powers(raw_arrays, evaluate))
+
+    def get_column_powers(self, raw_arrays, evaluate):
+        # the fitness cache answers first, then the layout archive, evaluate(indexes) only gets what neither knows
+        if self.layout_archive is None:
+            return self.layout_fitness_cache.get_column_powers(raw_arrays, evaluate)
+
+        def evaluate_unarchived(indexes):
+            is_found, archived_column_powers = self.layout_archive.get_column_powers(raw_arrays[indexes])
+            self.generation_archive_hits += len(archived_column_powers)
+            if np.all(is_found):
+                return archived_column_powers
+            missing_column_powers = np.asarray(evaluate(indexes[~is_found]), dtype=float)
+            column_powers = np.empty((len(indexes), missing_column_powers.shape[1]))
+            column_powers[~is_found] = missing_column_powers
+            column_powers[is_found] = archived_column_powers
+            return column_powers
+
+        return self.layout_fitness_cache.get_column_powers(raw_arrays, evaluate_unarchived)
+
+    def replace_duplicates(self, raw_arrays, seen_keys):
+        # Rows repeating a genome of seen_keys or an earlier row are mutated again, and the ones still repeating after
+        # deduplicate_mutation_rounds become random layouts. seen_keys gets the genomes of the rows.
+        with self.phase_profiler.phase("dedup"):
+            duplicate_rows = diversity.get_duplicate_rows(raw_arrays, np.arange(len(raw_arrays)), seen_keys)
+            self.generation_duplicate_num += len(duplicate_rows)
+            for i in range(self.config.deduplicate_mutation_rounds):
+                if len(duplicate_rows) == 0:
+                    return
+                duplicates = raw_arrays[duplicate_rows]
+                self.make_mutation(duplicates)
+                raw_arrays[duplicate_rows] = duplicates
+                duplicate_rows = diversity.get_duplicate_rows(raw_arrays, duplicate_rows, seen_keys)
+        if len(duplicate_rows) > 0:
+            # outside the "dedup" phase, the "random" phase of get_random_raw_arrays times the replacements
+            raw_arrays[duplicate_rows] = self.get_random_raw_arrays(len(duplicate_rows))
+            with self.phase_profiler.phase("dedup"):
+                seen_keys.update(diversity.get_genome_keys(raw_arrays[duplicate_rows]))
+
+    def get_random_population(self, size, seen_keys=None):
+        raw_arrays = self.get_random_raw_arrays(size)
+        if seen_keys is not None:
+            self.replace_duplicates(raw_arrays, seen_keys)
+        return self.get_population_from_raw_arrays(raw_arrays)
+
+    def get_crossover_population(self, parents, seen_keys=None):
+        if len(parents) % 2 != 0:
+            return parents
+        else:
+            with self.phase_profiler.phase("crossover"):
+                raw_arrays = parents.get_unpacked().genomes.copy()
+                self.make_crossover(raw_arrays)
+            with self.phase_profiler.phase("mutation"):
+                self.make_mutation(raw_arrays)
+            if seen_keys is not None:
+                self.replace_duplicates(raw_arrays, seen_keys)
+            if self.config.sparse_genomes:
+                # sparse evaluation already scales with the turbines, the children are evaluated whole
+                return self.get_population_from_cells(raw_arrays)
+            return self.get_offspring_population(parents, raw_arrays)
+
+    def get_top_piece_generation(self, generation, rate):
+        with self.phase_profiler.phase("sorting"):
+            top_indexes = generation.get_top_indexes(int(self.config.population_size * rate))
+        with self.phase_profiler.phase("selection"):
+            return generation.take(top_indexes)
+
+    def get_generation(self, prev_generation):
+        config = self.config
+        self.phase_profiler.start_generation()
+        self.generation_duplicate_num = 0
+        self.generation_archive_hits = 0
+        # with deduplicate, seen_keys holds the genomes placed in the generation so far
+        seen_keys = set() if config.deduplicate else None
+        self.objective.start_generation(self, prev_generation)
+        if prev_generation is None and self.layout_archive is not None:
+            generation = self.get_archive_population(int(config.population_size * config.archive_warm_start_rate))
+            if seen_keys is not None:
+                seen_keys.update(diversity.get_genome_keys(generation.genomes))
+            generation = population.concatenate_populations([
+                generation,
+                self.get_random_population(config.population_size - len(generation), seen_keys)
+            ])
+        elif prev_generation is None:
+            generation = self.get_random_population(config.population_size, seen_keys)
+        else:
+            if config.sparse_genomes:
+                # a resumed checkpoint or a migrated island arrives as raw_arrays
+                prev_generation = prev_generation.get_sparse()
+            elite_generation = self.get_top_piece_generation(prev_generation, config.er)
+            if seen_keys is not None:
+                seen_keys.update(diversity.get_genome_keys(elite_generation.get_unpacked().genomes))
+            generation = population.concatenate_populations([
+                elite_generation,
+                self.get_crossover_population(self.get_top_piece_generation(prev_generation, config.cr), seen_keys),
+                self.get_random_population(int(config.population_size * (1 - config.er - config.cr)), seen_keys)
+            ])
+        self.duplicate_num += self.generation_duplicate_num
+        self.generation_local_search_evaluations = 0
+        if config.local_search_top_k > 0 and self.generation_index % config.local_search_interval == 0:
+            generation = self.get_local_search_generation(generation)
+        if self.layout_archive is not None:
+            self.store_archive_layouts(generation)
+        self.generation_index += 1
+        self.archive_hits += self.generation_archive_hits
+        self.layout_fitness_cache.end_generation()
+        self.phase_profiler.end_generation(self.layout_fitness_cache.generation_stats[-1])
+        if self.first_generation_time is None:
+            self.first_generation_time = time.perf_counter()
+        return generation
+
+    def get_local_search_generation(self, generation):
+        # Runs the local search on the best local_search_top_k layouts within local_search_budget and puts the
+        # improved ones at the front of the generation. Layouts searched to a local optimum before are skipped, and so
+        # are the ones whose neighbourhood takes more evaluations to set up than the budget has left.
+        config = self.config
+        budget = config.local_search_budget
+        improved_indexes = []
+        improved_raw_arrays = []
+        with self.phase_profiler.phase("local search"):
+            top_indexes = generation.get_top_indexes(config.local_search_top_k)
+            raw_arrays = generation.get_raw_arrays()
+            column_powers = generation.column_powers
+            if column_powers is None:
+                column_powers = self.column_power_table.get_batch_column_powers(
+                    raw_arrays.reshape(len(raw_arrays), config.column_num, config.row_num))
+            for index, key in zip(top_indexes.tolist(), diversity.get_genome_keys(raw_arrays[top_indexes])):
+                if budget <= 0:
+                    break
+                if key in self.local_search_keys or local_search.get_setup_evaluations(raw_arrays[index], config.row_num) > budget:
+                    continue
+                raw_array, is_local_optimum, evaluations = local_search.search_layout(
+                    self.column_power_table, self.objective, raw_arrays[index], column_powers[index], budget, self.rng)
+                budget -= evaluations
+                # a search stopped by the budget may go on from the same layout in a later generation
+                if is_local_optimum:
+                    self.local_search_keys.add(key)
+                    self.local_search_keys.update(diversity.get_genome_keys(raw_array[None]))
+                if np.any(raw_array != raw_arrays[index]):
+                    improved_indexes.append(index)
+                    improved_raw_arrays.append(raw_array)
+        self.generation_local_search_evaluations = config.local_search_budget - budget
+        self.local_search_evaluations += self.generation_local_search_evaluations
+        if len(improved_indexes) == 0:
+            return generation
+
+        # the moves were scored on unrounded column powers, a layout only replaces its original if the exact evaluation agrees
+        improved_generation = self.get_population_from_raw_arrays(np.array(improved_raw_arrays))
+        improved_indexes = np.array(improved_indexes)
+        is_better = improved_generation.get_sort_keys() < generation.take(improved_indexes).get_sort_keys()
+        self.local_search_improved_num += int(np.count_nonzero(is_better))
+        kept_indexes = np.setdiff1d(np.arange(len(generation)), improved_indexes[is_better])
+        return population.concatenate_populations([improved_generation.take(np.flatnonzero(is_better)), generation.take(kept_indexes)])
+
+    def get_archive_population(self, size):
+        # The archive's best "size" layouts under this run's objective, scored from their archived column powers
+        # a chunk at a time. A fixed turbine count only takes the layouts having it.
+        best_generation = None
+        with self.phase_profiler.phase("archive"):
+            for raw_arrays, column_powers in self.layout_archive.get_chunks():
+                if self.objective.is_turbine_num_fixed:
+                    is_valid = np.count_nonzero(raw_arrays, axis=1) == self.objective.get_turbine_nums(self, 1)[0]
+                    raw_arrays = raw_arrays[is_valid]
+                    column_powers = column_powers[is_valid]
+                chunk_generation = self.objective.get_population(self, raw_arrays, column_powers)
+                if best_generation is not None:
+                    chunk_generation = population.concatenate_populations([best_generation, chunk_generation])
+                best_generation = chunk_generation.take(chunk_generation.get_top_indexes(size))
+            if best_generation is None:
+                return self.objective.get_population(self, np.zeros((0, self.config.cell_num), dtype=np.uint8),
+                                                     np.zeros((0, self.layout_archive.column_width)))
+            return best_generation
+
+    def store_archive_layouts(self, generation):
+        # the best archive_store_rate of the generation joins the archive, the ones archived already are skipped there
+        with self.phase_profiler.phase("archive"):
+            top_indexes = generation.get_top_indexes(int(self.config.population_size * self.config.archive_store_rate))
+            raw_arrays = generation.get_raw_arrays()[top_indexes]
+            column_powers = generation.column_powers
+            if column_powers is None:
+                column_powers = self.get_layout_column_powers(raw_arrays.reshape(len(raw_arrays), self.config.column_num, self.config.row_num))
+            else:
+                column_powers = column_powers[top_indexes]
+            self.layout_archive.append(raw_arrays, column_powers)
+
+    def get_free_turbine_power(self):
+        if self.wind_rose_evaluator is None:
+            return self.config.turbine_power
+        return self.wind_rose_evaluator.get_free_turbine_power()
+
+    def get_bound(self):
+        # the objective's bound on the optimum fitness, computed once per engine
+        if self.bound is None:
+            # the cutoff check computes it after a generation, its time goes to that generation's record
+            with self.phase_profiler.phase_after_generation("bound"):
+                self.bound = self.objective.get_bound(self)
+        return self.bound
+
+    def is_cutoff_reached(self, winner_lay):
+        return self.objective.is_cutoff_reached(self, winner_lay)
+
+    def run_evolution(self):
+        config = self.config
+        is_resumed = config.checkpoint_path is not None and os.path.exists(config.checkpoint_path)
+        telemetry_sink = None
+        if config.telemetry_path is not None:
+            # a resumed run appends, once the checkpoint is loaded the records past it are dropped
+            telemetry_sink = telemetry.TelemetrySink(config.telemetry_path, config.telemetry_buffer_size, is_appended=is_resumed)
+        try:
+            return self.evolve(is_resumed, telemetry_sink)
+        finally:
+            if telemetry_sink is not None:
+                telemetry_sink.close()
+
+    def evolve(self, is_resumed, telemetry_sink):
+        config = self.config
+        if is_resumed:
+            saved_state = checkpoint.load_checkpoint(config.checkpoint_path, config.cell_num)
+            self.rng.bit_generator.state = saved_state["rng_state"]
+            active_generation = saved_state["population"]
+            winner_layouts_powers_list = saved_state["winner_layouts_powers_list"]
+            evolve_num = saved_state["evolve_num"]
+            self.generation_index = evolve_num + 1
+            self.local_search_keys = saved_state["local_search_keys"]
+            self.local_search_evaluations = saved_state["local_search_evaluations"]
+            self.local_search_improved_num = saved_state["local_search_improved_num"]
+            # the loaded population is this run's first generation, even when no generation is left to run
+            self.first_generation_time = time.perf_counter()
+            if telemetry_sink is not None:
+                telemetry_sink.drop_records_after(evolve_num)
+            # stderr keeps the stdout of cli.py --json a single JSON object
+            print("Resumed from " + config.checkpoint_path + " at evolve " + str(evolve_num), file=sys.stderr)
+        else:
+            active_generation = self.get_generation(None)
+            winner_layouts_powers_list = [active_generation.get_layout(active_generation.get_best_index())["fitness"]]
+            evolve_num = 0
+            self.write_telemetry(telemetry_sink, active_generation, evolve_num)
+        winner_lay = active_generation.get_layout(active_generation.get_best_index())
+        for i in range(evolve_num, config.generation_num):
+            if self.is_cutoff_reached(winner_lay):
+                break
+            active_generation = self.get_generation(active_generation)
+            winner_lay = active_generation.get_layout(active_generation.get_best_index())
+            winner_layouts_powers_list.append(winner_lay["fitness"])
+            evolve_num += 1
+            self.write_telemetry(telemetry_sink, active_generation, evolve_num)
+            if config.checkpoint_path is not None and evolve_num % config.checkpoint_interval == 0:
+                checkpoint.save_checkpoint(config.checkpoint_path, active_generation, self.rng, evolve_num, winner_layouts_powers_list,
+                                           self.local_search_keys, self.local_search_evaluations, self.local_search_improved_num)
+
+        return {
+            "winner_lay": winner_lay,
+            "evolve_num": evolve_num,
+            "winner_layouts_powers_list": winner_layouts_powers_list,
+            "generation": active_generation
+        }
+
+    def write_telemetry(self, telemetry_sink, generation, evolve_num):
+        if telemetry_sink is None:
+            return
+        phase_record = self.phase_profiler.generation_records[-1]
+        record = {"generation": evolve_num}
+        record.update(telemetry.get_population_stats(generation))
+        record.update(self.objective.get_telemetry_fields(generation))
+        record.update({
+            "wall_time": phase_record["wall_time"],
+            "evaluations_per_sec": phase_record["evaluations_per_sec"],
+            "cache_hits": phase_record["cache"]["hits"],
+            "replaced_duplicates": self.generation_duplicate_num,
+            "local_search_evaluations": self.generation_local_search_evaluations,
+            "archive_hits": self.generation_archive_hits,
+            "elapsed_sec": time.time() - self.start_time
+        })
+        telemetry_sink.write(record)
+
+    def start_evolution(self):
+        self.start_time = time.time()
+        result = self.run_evolution()
+        cache = self.layout_fitness_cache
+        print("Fitness cache        : " + str(cache.total_hits) + " hits, " + str(cache.total_misses) + " misses, "
+              + str(round(100 * cache.get_hit_rate(), 2)) + " % hit rate")
+        if self.config.deduplicate:
+            print("Duplicates replaced  : " + str(self.duplicate_num))
+        if self.config.local_search_top_k > 0:
+            print("Local search         : " + str(self.local_search_evaluations) + " column evaluations, "
+                  + str(self.local_search_improved_num) + " layouts improved")
+        if self.layout_archive is not None:
+            print("Layout archive       : " + str(self.archive_hits) + " hits, " + str(len(self.layout_archive)) + " layouts in "
+                  + self.layout_archive.path)
+        if self.config.show_phase_summary:
+            profiler.print_phase_summary(self.phase_profiler.generation_records)
+        self.print_winner_report(result["winner_lay"], result["evolve_num"], result["winner_layouts_powers_list"])
+        return result
+
+    def print_winner_report(self, winner_lay, evolve_num, winner_layouts_powers_list):
+        execution_time = (time.time() - self.start_time)
+        print("Execution time in sec: " + str(execution_time))
+        print("-------------  Winner Layout  -------------")
+        print("Evolve               : " + str(evolve_num) + " times")
+        print("raw_array            : " + str(winner_lay["raw_array"]))
+        print("column_divided_array : " + str(self.get_column_divided_array_from_raw_array(winner_lay["raw_array"].tolist())))
+        print("power                : " + str(winner_lay["power"]))
+        for line in self.objective.get_report_lines(self, winner_lay):
+            print(line)
+        print("cutoff efficiency    : " + str(round(self.config.cut_power_coefficient * 100, 2)) + " %")
+        print("-------------  Winner Layout  -------------")
+        print("-------------  Winners List  -------------")
+        print(len(winner_layouts_powers_list))
+        print(winner_layouts_powers_list)
+        for line in self.objective.get_winners_list_lines(winner_layouts_powers_list):
+            print(line)
+        print("-------------  Winners List  -------------")
+
+        if not self.config.show_plot:
+            return
+        import matplotlib.pyplot as plt
+        x = range(len(winner_layouts_powers_list))
+        y = winner_layouts_powers_list
+        plt.title("Line graph")
+        plt.xlabel("Generation number")
+        plt.ylabel("Fitness value")
+        plt.plot(x, y, color="red")
+        plt.show()
@@ -0,0 +1,288 @@
+# -*- coding: utf-8 -*-
+
+import argparse
+import asyncio
+import base64
+import collections
+import concurrent.futures
+import contextlib
+import importlib
+import json
+import sys
+import time
+import numpy as np
+import cli
+import engine
+
+# Long-lived layout evaluation service: python evaluation_service.py Model_A [--socket PATH]
+# Reads one JSON request per line from stdin, or from every connection to the Unix socket at PATH, and answers each
+# with one JSON line carrying the request's "id". Answers may come out of order.
+#   {"id": 1, "layouts": [[0, 1, ...], ...]}                     raw_arrays of cell_num 0/1 values
+#   {"id": 2, "packed": ["<base64 of np.packbits(raw_array)>"]}  bit-packed raw_arrays
+# get power, cost, cost_power_ratio, turbine_num and wind_speeds, the speed at every turbine in raw_array order, per
+# layout. cost and cost_power_ratio are null when the model's objective has no cost, wind_speeds under a wind rose.
+# {"id": 3, "command": "metrics"} returns the request, latency and throughput figures of get_metrics.
+# The engine, with its wake tables and fitness cache, lives as long as the service. Requests arriving while a batch
+# is evaluated are coalesced into the next one.
+
+stream_limit = 1 << 28          # longest request line on the socket in bytes
+latency_window = 10000          # latest requests the latency percentiles are taken over
+
+
+def get_raw_arrays(request, cell_num):
+    # (size, cell_num) uint8 raw_arrays of a request, ValueError when they are malformed
+    if "packed" in request:
+        packed_width = (cell_num + 7) // 8
+        packed = [base64.b64decode(text, validate=True) for text in request["packed"]]
+        if any(len(row) != packed_width for row in packed):
+            raise ValueError("packed layouts must have " + str(packed_width) + " bytes")
+        return np.unpackbits(np.frombuffer(b"".join(packed), dtype=np.uint8).reshape(len(packed), packed_width), axis=1, count=cell_num)
+    # cast only once every cell is known to be an integer 0 or 1, a cast first would turn 0.7 into 0
+    raw_arrays = np.array(request["layouts"])
+    if raw_arrays.ndim != 2 or raw_arrays.shape[1] != cell_num:
+        raise ValueError("layouts must be lists of " + str(cell_num) + " cells")
+    if raw_arrays.dtype.kind not in "iu" or np.any((raw_arrays != 0) & (raw_arrays != 1)):
+        raise ValueError("layout cells must be 0 or 1")
+    return raw_arrays.astype(np.uint8)
+
+
+class EvaluationService:
+    # Scores batches of raw_arrays with one engine. evaluate() queues a request, run_batches() takes every queued
+    # request up to max_batch_layouts, waiting max_wait_sec for more after the first one, and evaluates them as one
+    # batch on a worker thread, so the event loop keeps reading requests meanwhile.
+
+    def __init__(self, model_engine, max_batch_layouts, max_wait_sec):
+        self.engine = model_engine
+        self.max_batch_layouts = max_batch_layouts
+        self.max_wait_sec = max_wait_sec
+        self.queue = asyncio.Queue()
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self.start_time = time.perf_counter()
+        self.request_num = 0
+        self.error_num = 0
+        self.layout_num = 0
+        self.batch_num = 0
+        self.evaluation_time = 0.0
+        self.latencies = collections.deque(maxlen=latency_window)
+
+    async def evaluate(self, raw_arrays):
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((raw_arrays, future))
+        return await future
+
+    async def get_batch(self):
+        batch = [await self.queue.get()]
+        layout_num = len(batch[0][0])
+        deadline = time.perf_counter() + self.max_wait_sec
+        while layout_num < self.max_batch_layouts:
+            if self.queue.empty():
+                remaining_sec = deadline - time.perf_counter()
+                if remaining_sec <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), remaining_sec))
+                except asyncio.TimeoutError:
+                    break
+            else:
+                batch.append(self.queue.get_nowait())
+            layout_num += len(batch[-1][0])
+        return batch
+
+    async def run_batches(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self.get_batch()
+            sizes = [len(raw_arrays) for raw_arrays, future in batch]
+            evaluation_start_time = time.perf_counter()
+            try:
+                results = await loop.run_in_executor(self.executor, self.get_results, np.concatenate([raw_arrays for raw_arrays, future in batch]))
+            except Exception as error:
+                for raw_arrays, future in batch:
+                    if not future.done():
+                        future.set_exception(error)
+                continue
+            self.evaluation_time += time.perf_counter() - evaluation_start_time
+            self.batch_num += 1
+            self.layout_num += sum(sizes)
+            start = 0
+            for (raw_arrays, future), size in zip(batch, sizes):
+                if not future.done():
+                    future.set_result({name: values[start:start + size] for name, values in results.items()})
+                start += size
+
+    def get_results(self, raw_arrays):
+        # power, cost, cost_power_ratio, turbine_num and wind_speeds of every layout, as lists
+        model_engine = self.engine
+        config = model_engine.config
+        generation = model_engine.get_population_from_raw_arrays(raw_arrays)
+        power = generation.power
+        cost = None
+        cost_power_ratio = None
+        if model_engine.objective.has_cost:
+            cost = np.array([model_engine.objective.get_cost(turbine_num) for turbine_num in generation.turbine_num.tolist()], dtype=float)
+            cost_power_ratio = [ratio if power_value > 0 else None for ratio, power_value in
+                                zip((cost / np.where(power > 0, power, 1)).tolist(), power.tolist())]
+        wind_speeds = [None] * len(raw_arrays)
+        if model_engine.wind_rose_evaluator is None:
+            cell_speeds = model_engine.column_power_table.get_cell_wind_speeds(
+                raw_arrays.reshape(len(raw_arrays), config.column_num, config.row_num)).reshape(len(raw_arrays), config.cell_num)
+            turbine_speeds = cell_speeds[raw_arrays == 1].tolist()
+            ends = np.cumsum(generation.turbine_num).tolist()
+            wind_speeds = [turbine_speeds[end - turbine_num:end] for end, turbine_num in zip(ends, generation.turbine_num.tolist())]
+        return {
+            "power": power.tolist(),
+            "cost": [None] * len(raw_arrays) if cost is None else cost.tolist(),
+            "cost_power_ratio": [None] * len(raw_arrays) if cost_power_ratio is None else cost_power_ratio,
+            "turbine_num": generation.turbine_num.tolist(),
+            "wind_speeds": wind_speeds
+        }
+
+    async def get_response(self, line):
+        request_start_time = time.perf_counter()
+        self.request_num += 1
+        request = {}
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                request = {}
+                raise ValueError("a request must be a JSON object")
+            if request.get("command") == "metrics":
+                response = {"metrics": self.get_metrics()}
+            elif "command" in request:
+                raise ValueError("unknown command: " + str(request["command"]))
+            else:
+                response = await self.evaluate(get_raw_arrays(request, self.engine.config.cell_num))
+        except (ValueError, KeyError, TypeError) as error:
+            self.error_num += 1
+            response = {"error": str(error)}
+        latency_sec = time.perf_counter() - request_start_time
+        self.latencies.append(latency_sec)
+        response["id"] = request.get("id")
+        response["latency_ms"] = 1000 * latency_sec
+        return json.dumps(response) + "\n"
+
+    def get_metrics(self):
+        uptime_sec = time.perf_counter() - self.start_time
+        latencies_ms = 1000 * np.array(self.latencies) if len(self.latencies) > 0 else np.zeros(1)
+        cache = self.engine.layout_fitness_cache
+        return {
+            "uptime_sec": uptime_sec,
+            "requests": self.request_num,
+            "errors": self.error_num,
+            "layouts": self.layout_num,
+            "batches": self.batch_num,
+            "mean_batch_layouts": self.layout_num / self.batch_num if self.batch_num > 0 else 0.0,
+            "requests_per_sec": self.request_num / uptime_sec,
+            "layouts_per_sec": self.layout_num / uptime_sec,
+            "evaluation_layouts_per_sec": self.layout_num / self.evaluation_time if self.evaluation_time > 0 else 0.0,
+            "latency_ms": {
+                "mean": float(np.mean(latencies_ms)),
+                "p50": float(np.percentile(latencies_ms, 50)),
+                "p95": float(np.percentile(latencies_ms, 95)),
+                "p99": float(np.percentile(latencies_ms, 99)),
+                "max": float(np.max(latencies_ms))
+            },
+            "cache_hit_rate": cache.get_hit_rate()
+        }
+
+    async def serve_stream(self, read_line, write):
+        # answers every line "await read_line()" returns through write(text) until it returns b"", each request in its
+        # own task so they can be coalesced
+        tasks = set()
+
+        async def answer(line):
+            write(await self.get_response(line))
+
+        while True:
+            line = await read_line()
+            if not line:
+                break
+            if line.strip():
+                task = asyncio.create_task(answer(line))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        if len(tasks) > 0:
+            await asyncio.wait(list(tasks))
+
+
+async def serve_stdio(service):
+    # stdin is read on a thread, which works for pipes, files and terminals alike
+    loop = asyncio.get_running_loop()
+
+    def read_line():
+        return loop.run_in_executor(None, sys.stdin.buffer.readline)
+
+    def write(text):
+        sys.stdout.write(text)
+        sys.stdout.flush()
+
+    await service.serve_stream(read_line, write)
+
+
+async def serve_socket(service, socket_path):
+    async def serve_connection(reader, writer):
+        try:
+            await service.serve_stream(reader.readline, lambda text: writer.write(text.encode()))
+        finally:
+            writer.close()
+
+    server = await asyncio.start_unix_server(serve_connection, path=socket_path, limit=stream_limit)
+    print("Serving " + socket_path, file=sys.stderr)
+    async with server:
+        await server.serve_forever()
+
+
+async def run_service(model_engine, args):
+    service = EvaluationService(model_engine, args.max_batch_layouts, args.max_wait_ms / 1000)
+    # A full layout loads the wake tables and kernel before the first request. numba's threads must be started from
+    # the main thread, when the worker thread starts them the process hangs at exit.
+    service.get_results(np.ones((1, model_engine.config.cell_num), dtype=np.uint8))
+    batch_task = asyncio.create_task(service.run_batches())
+    try:
+        if args.socket is None:
+            await serve_stdio(service)
+        else:
+            await serve_socket(service, args.socket)
+    finally:
+        batch_task.cancel()
+        service.executor.shutdown()
+
+
+def get_parser():
+    parser = argparse.ArgumentParser(description="Scores batches of layouts sent as JSON lines on stdin or a Unix socket")
+    parser.add_argument("model", help="module declaring config and objective, Model_A or Model_B")
+    parser.add_argument("--socket", help="Unix socket path to listen on instead of stdin and stdout")
+    parser.add_argument("--config", help="JSON file of settings and objective attributes")
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=VALUE", help="any setting or objective attribute, may repeat")
+    parser.add_argument("--max_batch_layouts", type=int, default=4096, help="layouts coalesced into one evaluation at most")
+    parser.add_argument("--max_wait_ms", type=float, default=1.0, help="time a batch waits for more requests after its first one")
+    return parser
+
+
+def main(argv):
+    args = get_parser().parse_args(argv)
+    model = importlib.import_module(args.model)
+    changes = {}
+    if args.config is not None:
+        with open(args.config) as config_file:
+            changes.update(json.load(config_file))
+    for assignment in args.set:
+        name, value = assignment.split("=", 1)
+        changes[name] = cli.get_value(value)
+    # requests always arrive as raw_arrays
+    changes["sparse_genomes"] = False
+    config, objective = engine.get_changed_model(model.config, model.objective, changes)
+    model_engine = engine.Engine(config, objective)
+    # stdout carries the answers, the warnings go to stderr
+    with contextlib.redirect_stdout(sys.stderr):
+        if not model_engine.is_static_values_valid():
+            return 2
+    try:
+        asyncio.run(run_service(model_engine, args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
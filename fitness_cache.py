@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+import collections
+import numpy as np
+import diversity
+
+entry_overhead = 200    # rough bytes held by one entry besides its key and value
+
+
+class FitnessCache:
+    # LRU map from a genome key (see diversity.py) to the column powers of that layout, kept under max_bytes.
+    # Hits and misses are counted per generation, end_generation closes the current generation's record.
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = collections.OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.total_hits = 0
+        self.total_misses = 0
+        self.generation_stats = []
+
+    def get_column_powers(self, genomes, evaluate):
+        # evaluate(indexes) must return the column powers of genomes[indexes], it is only called for the misses
+        genomes = np.asarray(genomes)
+        if self.max_bytes <= 0:
+            self.count(0, len(genomes))
+            return evaluate(np.arange(len(genomes)))
+
+        keys = diversity.get_genome_keys(genomes)
+        values = [self.entries.get(key) for key in keys]
+        hit_indexes = [i for i in range(len(keys)) if values[i] is not None]
+        miss_indexes = np.array([i for i in range(len(keys)) if values[i] is None], dtype=np.int64)
+        self.count(len(hit_indexes), len(miss_indexes))
+        for i in hit_indexes:
+            self.entries.move_to_end(keys[i])
+
+        column_powers = None
+        if len(miss_indexes) > 0 or len(hit_indexes) == 0:
+            missing_column_powers = np.asarray(evaluate(miss_indexes), dtype=float)
+            column_powers = np.empty((len(keys), missing_column_powers.shape[1]))
+            column_powers[miss_indexes] = missing_column_powers
+            for i, row in zip(miss_indexes.tolist(), missing_column_powers):
+                self.put(keys[i], row.tobytes())
+        if len(hit_indexes) > 0:
+            hit_column_powers = np.frombuffer(b"".join(values[i] for i in hit_indexes), dtype=float).reshape(len(hit_indexes), -1)
+            if column_powers is None:
+                column_powers = np.empty((len(keys), hit_column_powers.shape[1]))
+            column_powers[hit_indexes] = hit_column_powers
+        return column_powers
+
+    def put(self, key, value):
+        if key in self.entries:
+            return
+        self.entries[key] = value
+        self.bytes += len(key) + len(value) + entry_overhead
+        while self.bytes > self.max_bytes and len(self.entries) > 0:
+            old_key, old_value = self.entries.popitem(last=False)
+            self.bytes -= len(old_key) + len(old_value) + entry_overhead
+
+    def count(self, hits, misses):
+        self.hits += hits
+        self.misses += misses
+        self.total_hits += hits
+        self.total_misses += misses
+
+    def end_generation(self):
+        self.generation_stats.append({
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self.entries),
+            "bytes": self.bytes
+        })
+        self.hits = 0
+        self.misses = 0
+
+    def get_hit_rate(self):
+        lookups = self.total_hits + self.total_misses
+        return self.total_hits / lookups if lookups > 0 else 0.0
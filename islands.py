@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+
+import concurrent.futures
+import importlib
+import os
+import sys
+import time
+import numpy as np
+import engine
+import population
+import profiler
+
+island_num = 8
+migration_interval = 10         # in generations
+migrant_num = 5                 # best layouts sent by every island on each migration
+migration_topology = "ring"     # "ring" or "complete"
+random_seed = 1                 # seeds the islands of a model whose config has no random_seed
+
+model_engines = {}
+
+
+def get_model_engine(model_name):
+    # one engine per model and process, a worker keeps it between the epochs it runs
+    if model_name not in model_engines:
+        model = importlib.import_module(model_name)
+        model_engines[model_name] = engine.Engine(model.config, model.objective)
+    return model_engines[model_name]
+
+
+def get_new_island(seed):
+    return {
+        "population": None,
+        "rng_state": np.random.default_rng(seed).bit_generator.state,
+        "generation_index": 0,
+        "local_search_keys": set()
+    }
+
+
+def get_migration_sources(island_index, size, topology):
+    # indexes of the islands whose best layouts move into island_index
+    if topology == "ring":
+        return [(island_index - 1) % size] if size > 1 else []
+    if topology == "complete":
+        return [i for i in range(size) if i != island_index]
+    raise ValueError("unknown migration topology: " + str(topology))
+
+
+def run_island_epoch(model_name, island, generation_count):
+    # Runs in a worker process. The island travels as a bit-packed population plus its RNG state and local search
+    # state, so any worker can pick it up and continue exactly where the previous epoch stopped.
+    model = get_model_engine(model_name)
+    model.rng.bit_generator.state = island["rng_state"]
+    model.generation_index = island["generation_index"]
+    model.local_search_keys = island["local_search_keys"]
+    first_record_index = len(model.phase_profiler.generation_records)
+
+    winner_layouts_powers_list = []
+    if island["population"] is None:
+        active_generation = model.get_generation(None)
+        winner_lay = active_generation.get_layout(active_generation.get_best_index())
+        winner_layouts_powers_list.append(winner_lay["fitness"])
+    else:
+        active_generation = island["population"].get_unpacked()
+        winner_lay = active_generation.get_layout(active_generation.get_best_index())
+    evolve_num = 0
+    for i in range(generation_count):
+        if model.is_cutoff_reached(winner_lay):
+            break
+        active_generation = model.get_generation(active_generation)
+        winner_lay = active_generation.get_layout(active_generation.get_best_index())
+        winner_layouts_powers_list.append(winner_lay["fitness"])
+        evolve_num += 1
+
+    island = {
+        "population": active_generation.get_packed(),
+        "rng_state": model.rng.bit_generator.state,
+        "generation_index": model.generation_index,
+        "local_search_keys": model.local_search_keys
+    }
+    epoch_report = {
+        "winner_layouts_powers_list": winner_layouts_powers_list,
+        "evolve_num": evolve_num,
+        "is_cutoff_reached": model.is_cutoff_reached(winner_lay),
+        "phase_records": model.phase_profiler.generation_records[first_record_index:]
+    }
+    return island, epoch_report
+
+
+def migrate(islands, topology, size):
+    emigrants = [island["population"].take(island["population"].get_top_indexes(size)) for island in islands]
+    for island_index, island in enumerate(islands):
+        sources = get_migration_sources(island_index, len(islands), topology)
+        if len(sources) == 0:
+            continue
+        residents = island["population"]
+        immigrants = population.concatenate_populations([emigrants[source] for source in sources])
+        immigrants = immigrants.take(immigrants.get_top_indexes(len(residents) - 1))
+        survivors = residents.take(residents.get_top_indexes(len(residents) - len(immigrants)))
+        island["population"] = population.concatenate_populations([survivors, immigrants])
+
+
+def get_merged_winners_list(winners_lists, reverse):
+    merged_list = []
+    for generation_index in range(max(len(winners_list) for winners_list in winners_lists)):
+        values = [winners_list[generation_index] for winners_list in winners_lists if generation_index < len(winners_list)]
+        merged_list.append(max(values) if reverse else min(values))
+    return merged_list
+
+
+def start_island_evolution(model_name):
+    model = get_model_engine(model_name)
+    model.start_time = time.time()
+    seed = model.config.random_seed if model.config.random_seed is not None else random_seed
+    islands = [get_new_island(island_seed) for island_seed in engine.get_child_seeds(seed, island_num)]
+    winners_lists = [[] for island in islands]
+    phase_records = []
+    evolve_num = 0
+    remaining_generation_num = model.config.generation_num
+    with concurrent.futures.ProcessPoolExecutor(max_workers=min(island_num, os.cpu_count())) as executor:
+        while True:
+            generation_count = min(migration_interval, remaining_generation_num)
+            futures = [executor.submit(run_island_epoch, model_name, island, generation_count) for island in islands]
+            results = [future.result() for future in futures]
+            islands = [island for island, epoch_report in results]
+            for winners_list, (island, epoch_report) in zip(winners_lists, results):
+                winners_list.extend(epoch_report["winner_layouts_powers_list"])
+                phase_records.extend(epoch_report["phase_records"])
+            evolve_num += max(epoch_report["evolve_num"] for island, epoch_report in results)
+            remaining_generation_num -= generation_count
+            if remaining_generation_num <= 0 or any(epoch_report["is_cutoff_reached"] for island, epoch_report in results):
+                break
+            migrate(islands, migration_topology, migrant_num)
+
+    final_generation = population.concatenate_populations([island["population"] for island in islands]).get_unpacked()
+    winner_lay = final_generation.get_layout(final_generation.get_best_index())
+    for island_index, winners_list in enumerate(winners_lists):
+        print("Island " + str(island_index) + " best fitness : " + str(winners_list[-1]))
+    if model.config.show_phase_summary:
+        profiler.print_phase_summary(phase_records)
+    model.print_winner_report(winner_lay, evolve_num, get_merged_winners_list(winners_lists, final_generation.reverse))
+
+
+if __name__ == '__main__':
+    model_name = sys.argv[1] if len(sys.argv) > 1 else "Model_A"
+    if get_model_engine(model_name).is_static_values_valid():
+        start_island_evolution(model_name)
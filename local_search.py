@@ -0,0 +1,127 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+# Local search on one layout. A move either flips one cell, when the objective lets the turbine count change,
+# or moves a turbine to an empty cell of the same or another column. The wake only acts within a column, so the
+# power of every column with one cell flipped scores all flips and all moves between two columns, and only moves
+# within a column need their own column evaluated. After a move only the columns it changed are evaluated again.
+
+min_relative_improvement = 1e-8     # smaller gains are within the 4 digit rounding of layout powers
+
+
+class LayoutSearch:
+    # flip_powers[c, r] is the power of column c with row r flipped, pair_powers[c, r1, r2] the power of column c
+    # with its turbine at r1 moved to the empty row r2 (nan when that is no such move).
+    # evaluations counts the columns sent through the wake model.
+
+    def __init__(self, column_power_table, objective, raw_array, column_powers):
+        self.column_power_table = column_power_table
+        self.objective = objective
+        self.row_num = column_power_table.row_num
+        self.column_num = column_power_table.column_num
+        self.layout = np.array(raw_array, dtype=np.uint8).reshape(self.column_num, self.row_num)
+        self.column_powers = np.array(column_powers, dtype=float)
+        self.flip_powers = np.zeros((self.column_num, self.row_num))
+        self.pair_powers = np.full((self.column_num, self.row_num, self.row_num), np.nan)
+        self.evaluations = 0
+        self.update_columns(np.arange(self.column_num))
+
+    def get_column_powers(self, columns):
+        self.evaluations += len(columns)
+        return self.column_power_table.get_batch_column_powers(columns)
+
+    def update_columns(self, column_indexes):
+        row_num = self.row_num
+        rows = np.arange(row_num)
+        columns = self.layout[column_indexes]
+        flipped_columns = np.repeat(columns[:, None, :], row_num, axis=1)
+        flipped_columns[:, rows, rows] ^= 1
+        self.flip_powers[column_indexes] = self.get_column_powers(flipped_columns.reshape(-1, row_num)).reshape(len(column_indexes), row_num)
+
+        pair_indexes, one_rows, zero_rows = np.nonzero((columns[:, :, None] == 1) & (columns[:, None, :] == 0))
+        moved_columns = columns[pair_indexes]
+        moved_columns[np.arange(len(pair_indexes)), one_rows] = 0
+        moved_columns[np.arange(len(pair_indexes)), zero_rows] = 1
+        self.pair_powers[column_indexes] = np.nan
+        self.pair_powers[column_indexes[pair_indexes], one_rows, zero_rows] = self.get_column_powers(moved_columns)
+
+    def get_sort_keys(self, powers, turbine_num):
+        fitness = self.objective.get_fitness(powers, turbine_num)
+        return -fitness if self.objective.reverse else fitness
+
+    def make_improving_move(self, rng):
+        # Applies an improving move drawn at random among all of them, as a first-improvement scan in random order
+        # would, and returns True. Returns False when the layout is a local optimum.
+        row_num = self.row_num
+        cells = self.layout.reshape(-1)
+        turbine_num = int(np.count_nonzero(cells))
+        power = float(np.sum(self.column_powers))
+        current_key = self.get_sort_keys(np.array([power]), turbine_num)[0]
+        threshold = current_key - abs(current_key) * min_relative_improvement
+
+        flip_deltas = (self.flip_powers - self.column_powers[:, None]).reshape(-1)
+        one_cells = np.flatnonzero(cells == 1)
+        zero_cells = np.flatnonzero(cells == 0)
+        one_columns = one_cells // row_num
+        zero_columns = zero_cells // row_num
+        pair_deltas = self.pair_powers[one_columns[:, None], (one_cells % row_num)[:, None], zero_cells % row_num] - self.column_powers[one_columns, None]
+        move_deltas = np.where(one_columns[:, None] == zero_columns, pair_deltas, flip_deltas[one_cells, None] + flip_deltas[zero_cells])
+        move_ones, move_zeros = np.nonzero(self.get_sort_keys(power + move_deltas, turbine_num) < threshold)
+        removed_cells = [one_cells[move_ones]]
+        added_cells = [zero_cells[move_zeros]]
+
+        if not self.objective.is_turbine_num_fixed:
+            if turbine_num > 1:
+                removals = np.flatnonzero(self.get_sort_keys(power + flip_deltas[one_cells], turbine_num - 1) < threshold)
+                removed_cells.append(one_cells[removals])
+                added_cells.append(np.full(len(removals), -1))
+            additions = np.flatnonzero(self.get_sort_keys(power + flip_deltas[zero_cells], turbine_num + 1) < threshold)
+            removed_cells.append(np.full(len(additions), -1))
+            added_cells.append(zero_cells[additions])
+
+        removed_cells = np.concatenate(removed_cells)
+        added_cells = np.concatenate(added_cells)
+        if len(removed_cells) == 0:
+            return False
+        move_index = rng.integers(len(removed_cells))
+        self.make_move(int(removed_cells[move_index]), int(added_cells[move_index]))
+        return True
+
+    def make_move(self, removed_cell, added_cell):
+        # -1 stands for no cell
+        row_num = self.row_num
+        if removed_cell >= 0 and added_cell >= 0 and removed_cell // row_num == added_cell // row_num:
+            column_index = removed_cell // row_num
+            self.column_powers[column_index] = self.pair_powers[column_index, removed_cell % row_num, added_cell % row_num]
+            changed_columns = [column_index]
+        else:
+            changed_columns = []
+            for cell in [removed_cell, added_cell]:
+                if cell >= 0:
+                    self.column_powers[cell // row_num] = self.flip_powers[cell // row_num, cell % row_num]
+                    changed_columns.append(cell // row_num)
+        cells = self.layout.reshape(-1)
+        if removed_cell >= 0:
+            cells[removed_cell] = 0
+        if added_cell >= 0:
+            cells[added_cell] = 1
+        self.update_columns(np.array(changed_columns))
+
+
+def get_setup_evaluations(raw_array, row_num):
+    # columns LayoutSearch evaluates before its first move, every flip and every move within a column
+    turbine_nums = np.count_nonzero(np.reshape(raw_array, (-1, row_num)), axis=1)
+    return int(np.size(raw_array) + np.sum(turbine_nums * (row_num - turbine_nums)))
+
+
+def search_layout(column_power_table, objective, raw_array, column_powers, max_evaluations, rng):
+    # Moves until a local optimum or until max_evaluations columns were evaluated, the last step may pass it.
+    # Returns the layout's raw_array, whether it is a local optimum and the columns evaluated.
+    layout_search = LayoutSearch(column_power_table, objective, raw_array, column_powers)
+    is_local_optimum = False
+    while layout_search.evaluations < max_evaluations:
+        if not layout_search.make_improving_move(rng):
+            is_local_optimum = True
+            break
+    return layout_search.layout.reshape(-1), is_local_optimum, layout_search.evaluations
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import population
+import bounds
+import operators
+import sparse_layouts
+import turbine_strata
+
+# An objective is everything a model decides on its own: how many turbines a random layout gets, how the
+# column powers of a batch become fitness, the crossover and mutation operators, the optimum bound and cutoff
+# test, and its lines of the winner report. The engine runs the same evolution loop for every objective.
+# Whatever an objective keeps during one run lives in engine.objective_state, objectives are shared between runs.
+
+
+class Objective:
+    reverse = False                 # follows sorted(): False when a lower fitness is better
+    is_turbine_num_fixed = False    # True when every layout keeps the same turbine count
+    has_cost = False                # True when layouts have a cost, without one their cost column holds zeros
+
+    def start_generation(self, engine, prev_generation):
+        # called before every generation is built, prev_generation is None for the first one
+        pass
+
+    def get_turbine_nums(self, engine, size):
+        raise NotImplementedError
+
+    def get_fitness(self, powers, turbine_num):
+        # fitness of layouts of turbine_num turbines from their powers, used to score local search moves
+        raise NotImplementedError
+
+    def get_population(self, engine, raw_arrays, column_powers):
+        raise NotImplementedError
+
+    def make_crossover(self, raw_arrays, rng):
+        raise NotImplementedError
+
+    def make_mutation(self, raw_arrays, rng):
+        raise NotImplementedError
+
+    def make_sparse_crossover(self, cells, cell_num, rng):
+        # operators on sparse genomes (see sparse_layouts.py), only fixed turbine counts have them
+        raise NotImplementedError
+
+    def make_sparse_mutation(self, cells, cell_num, rng):
+        raise NotImplementedError
+
+    def get_bound(self, engine):
+        raise NotImplementedError
+
+    def is_cutoff_reached(self, engine, winner_lay):
+        raise NotImplementedError
+
+    def get_warning_msgs(self, config):
+        return []
+
+    def get_report_lines(self, engine, winner_lay):
+        return []
+
+    def get_winners_list_lines(self, winner_layouts_powers_list):
+        return []
+
+    def get_telemetry_fields(self, generation):
+        return {}
+
+
+class CostPowerRatioObjective(Objective):
+    # Model_A: minimizes cost / power over a variable number of turbines.
+    # is_stratified draws the turbine counts of random layouts among the ones that can still win (see turbine_strata.py).
+    has_cost = True
+
+    def __init__(self, get_cost, is_stratified=False):
+        self.get_cost = get_cost
+        self.is_stratified = is_stratified
+
+    def get_strata(self, engine):
+        # the engine's turbine count strata, get_cost is computed once for every count
+        if engine.objective_state is None:
+            costs = np.array([self.get_cost(n) for n in range(engine.config.cell_num + 1)], dtype=float)
+            engine.objective_state = turbine_strata.TurbineNumStrata(costs)
+        return engine.objective_state
+
+    def get_layout_best_powers(self, engine):
+        # computed once per engine, only when the bound or the stratified draws need it
+        strata = self.get_strata(engine)
+        if strata.layout_best_powers is None:
+            if engine.wind_rose_evaluator is not None:
+                strata.set_layout_best_powers(np.arange(engine.config.cell_num + 1) * engine.get_free_turbine_power())
+            else:
+                strata.set_layout_best_powers(bounds.get_layout_best_powers(engine.column_power_table))
+        return strata.layout_best_powers
+
+    def start_generation(self, engine, prev_generation):
+        if not self.is_stratified:
+            return
+        if prev_generation is None:
+            # an engine reused for another run, like an island worker, must not draw by the last run's weights
+            self.get_strata(engine).weights = None
+        else:
+            self.get_layout_best_powers(engine)
+            self.get_strata(engine).update_weights(prev_generation)
+
+    def get_turbine_nums(self, engine, size):
+        if self.is_stratified:
+            return self.get_strata(engine).get_turbine_nums(size, engine.rng)
+        return engine.rng.integers(1, engine.config.cell_num, size)
+
+    def get_population(self, engine, raw_arrays, column_powers):
+        power = engine.column_power_table.get_total_powers(column_powers)
+        turbine_nums = np.count_nonzero(raw_arrays, axis=1)
+        cost = self.get_strata(engine).costs[turbine_nums]
+        # a layout without power, like an empty one, gets the worst ratio instead of 0 / 0
+        fitness = np.divide(cost, power, out=np.full(len(power), np.inf), where=power > 0)
+        return population.Population(raw_arrays, power, fitness, cost, turbine_nums, reverse=False, column_powers=column_powers)
+
+    def get_fitness(self, powers, turbine_num):
+        return self.get_cost(turbine_num) / powers
+
+    def make_crossover(self, raw_arrays, rng):
+        operators.make_tail_crossover(raw_arrays, rng)
+
+    def make_mutation(self, raw_arrays, rng):
+        operators.make_flip_mutation(raw_arrays, rng)
+
+    def get_bound(self, engine):
+        return bounds.get_min_cost_power_ratio(self.get_layout_best_powers(engine), self.get_cost)
+
+    def is_cutoff_reached(self, engine, winner_lay):
+        if winner_lay["power"] > engine.config.cut_power_coefficient * winner_lay["turbine_num"] * engine.get_free_turbine_power():
+            return True
+        return bounds.is_ratio_within_gap(winner_lay["fitness"], engine.get_bound(), engine.config.optimality_gap)
+
+    def get_report_lines(self, engine, winner_lay):
+        max_power = winner_lay["turbine_num"] * engine.get_free_turbine_power()
+        return [
+            "max power            : " + str(max_power),
+            "efficiency           : " + str(round(100 * winner_lay["power"] / max_power, 2)) + " %",
+            "TURBINE NUMBER       : " + str(winner_lay["turbine_num"]),
+            "WINNER COST          : " + str(winner_lay["cost"]),
+            "cost / power bound   : " + str(engine.get_bound())
+        ]
+
+    def get_winners_list_lines(self, winner_layouts_powers_list):
+        return ["WINNER COST / POWER  : " + str(winner_layouts_powers_list[-1])]
+
+    def get_telemetry_fields(self, generation):
+        return {
+            "turbine_num_min": int(np.min(generation.turbine_num)),
+            "turbine_num_mean": float(np.mean(generation.turbine_num)),
+            "turbine_num_max": int(np.max(generation.turbine_num))
+        }
+
+
+class PowerObjective(Objective):
+    # Model_B: maximizes power with turbine_num turbines
+    reverse = True
+    is_turbine_num_fixed = True
+
+    def __init__(self, turbine_num):
+        self.turbine_num = turbine_num
+
+    def get_turbine_nums(self, engine, size):
+        return np.full(size, self.turbine_num)
+
+    def get_population(self, engine, raw_arrays, column_powers):
+        power = engine.column_power_table.get_total_powers(column_powers)
+        return population.Population(raw_arrays, power, power, reverse=True, cell_num=engine.config.cell_num, column_powers=column_powers,
+                                     sparse=engine.config.sparse_genomes)
+
+    def get_fitness(self, powers, turbine_num):
+        return powers
+
+    def make_crossover(self, raw_arrays, rng):
+        operators.make_swap_crossover(raw_arrays, rng)
+
+    def make_mutation(self, raw_arrays, rng):
+        operators.make_swap_mutation(raw_arrays, rng)
+
+    def make_sparse_crossover(self, cells, cell_num, rng):
+        sparse_layouts.make_swap_crossover(cells, cell_num, rng)
+
+    def make_sparse_mutation(self, cells, cell_num, rng):
+        sparse_layouts.make_swap_mutation(cells, cell_num, rng)
+
+    def get_bound(self, engine):
+        if engine.wind_rose_evaluator is not None:
+            return self.turbine_num * engine.get_free_turbine_power()
+        return bounds.get_fixed_count_power_bound(engine.column_power_table, self.turbine_num)
+
+    def is_cutoff_reached(self, engine, winner_lay):
+        if winner_lay["power"] > engine.config.cut_power_coefficient * self.turbine_num * engine.get_free_turbine_power():
+            return True
+        return bounds.is_power_within_gap(winner_lay["power"], engine.get_bound(), engine.config.optimality_gap)
+
+    def get_warning_msgs(self, config):
+        if self.turbine_num > config.cell_num:
+            return ["turbine_num, cell_num dan büyük olamaz"]
+        return []
+
+    def get_report_lines(self, engine, winner_lay):
+        max_power = self.turbine_num * engine.get_free_turbine_power()
+        return [
+            "max power            : " + str(max_power),
+            "efficiency           : " + str(round(100 * winner_lay["power"] / max_power, 2)) + " %",
+            "power bound          : " + str(engine.get_bound())
+        ]
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+# Every operator works in place on a (size, cell_num) 0/1 array of genomes. Crossovers pair rows 2i and 2i + 1.
+
+rejection_rounds = 8    # random draws per row before get_random_indexes scans the row
+
+
+def get_random_indexes(size, cell_num, is_valid, rng):
+    # One uniformly drawn valid cell per row, is_valid(rows, indexes) tells which cells qualify
+    # (indexes is slice(None) when whole rows are asked for).
+    # Plain random draws are tried first, which costs nothing per cell when valid cells are common.
+    # Rows that keep missing fall back to picking among their valid cells found by a scan.
+    indexes = rng.integers(0, cell_num, size)
+    is_found = is_valid(np.arange(size), indexes)
+    for i in range(rejection_rounds):
+        missing_rows = np.flatnonzero(~is_found)
+        if len(missing_rows) == 0:
+            return indexes, is_found
+        draws = rng.integers(0, cell_num, len(missing_rows))
+        is_hit = is_valid(missing_rows, draws)
+        indexes[missing_rows[is_hit]] = draws[is_hit]
+        is_found[missing_rows[is_hit]] = True
+
+    missing_rows = np.flatnonzero(~is_found)
+    if len(missing_rows) > 0:
+        valid_mask = is_valid(missing_rows, slice(None))
+        valid_counts = np.count_nonzero(valid_mask, axis=1)
+        valid_indexes = np.nonzero(valid_mask)[1]
+        has_valid = valid_counts > 0
+        picks = (np.cumsum(valid_counts) - valid_counts)[has_valid] + rng.integers(0, valid_counts[has_valid])
+        indexes[missing_rows[has_valid]] = valid_indexes[picks]
+        is_found[missing_rows[has_valid]] = True
+    return indexes, is_found
+
+
+def get_random_raw_arrays(size, cell_num, turbine_nums, rng):
+    sorted_raw_arrays = (np.arange(cell_num) < np.reshape(turbine_nums, (size, 1))).astype(np.uint8)
+    return rng.permuted(sorted_raw_arrays, axis=1)
+
+
+def fill_empty_layouts(raw_arrays, rng):
+    empty_rows = np.flatnonzero(~np.any(raw_arrays, axis=1))
+    raw_arrays[empty_rows, rng.integers(0, raw_arrays.shape[1], len(empty_rows))] = 1
+
+
+def make_tail_crossover(raw_arrays, rng):
+    # swaps the second half of every pair, a child left without turbines gets one at a random cell
+    middle_index = raw_arrays.shape[1] // 2
+    tails = raw_arrays[0::2, middle_index:].copy()
+    raw_arrays[0::2, middle_index:] = raw_arrays[1::2, middle_index:]
+    raw_arrays[1::2, middle_index:] = tails
+    fill_empty_layouts(raw_arrays, rng)
+
+
+def make_flip_mutation(raw_arrays, rng):
+    # flips one random cell of every layout, except that a single turbine is never removed
+    rows = np.flatnonzero(np.count_nonzero(raw_arrays, axis=1) != 1)
+    mutation_indexes = rng.integers(0, raw_arrays.shape[1], len(rows))
+    raw_arrays[rows, mutation_indexes] ^= 1
+
+
+def make_swap_crossover(raw_arrays, rng):
+    # the first layout of a pair takes one turbine cell of the second and gives back one of its own,
+    # so both keep their turbine count
+    first = raw_arrays[0::2]
+    second = raw_arrays[1::2]
+
+    def is_give_one(rows, indexes):
+        return (first[rows, indexes] == 0) & (second[rows, indexes] == 1)
+
+    def is_give_zero(rows, indexes):
+        return (first[rows, indexes] == 1) & (second[rows, indexes] == 0)
+
+    give_one_indexes, has_give_one = get_random_indexes(len(first), raw_arrays.shape[1], is_give_one, rng)
+    give_zero_indexes, has_give_zero = get_random_indexes(len(first), raw_arrays.shape[1], is_give_zero, rng)
+    pairs = np.flatnonzero(has_give_one & has_give_zero)
+    first_rows = 2 * pairs
+    second_rows = first_rows + 1
+    raw_arrays[first_rows, give_one_indexes[pairs]] = 1
+    raw_arrays[first_rows, give_zero_indexes[pairs]] = 0
+    raw_arrays[second_rows, give_one_indexes[pairs]] = 0
+    raw_arrays[second_rows, give_zero_indexes[pairs]] = 1
+
+
+def make_swap_mutation(raw_arrays, rng):
+    # moves one random turbine of every layout to a random empty cell, keeping its turbine count
+    def is_zero(rows, indexes):
+        return raw_arrays[rows, indexes] == 0
+
+    def is_one(rows, indexes):
+        return raw_arrays[rows, indexes] == 1
+
+    zero_indexes, has_zero = get_random_indexes(len(raw_arrays), raw_arrays.shape[1], is_zero, rng)
+    one_indexes, has_one = get_random_indexes(len(raw_arrays), raw_arrays.shape[1], is_one, rng)
+    rows = np.flatnonzero(has_zero & has_one)
+    raw_arrays[rows, zero_indexes[rows]] = 1
+    raw_arrays[rows, one_indexes[rows]] = 0
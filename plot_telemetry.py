@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+
+import sys
+import telemetry
+
+# Plots a telemetry file written by a run, live or finished: python plot_telemetry.py telemetry.jsonl [figure.png]
+
+
+def plot_telemetry(path, figure_path=None):
+    import matplotlib
+    if figure_path is not None:
+        matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    records = telemetry.read_records(path)
+    generations = [record["generation"] for record in records]
+    figure, (fitness_axis, diversity_axis) = plt.subplots(2, 1, sharex=True)
+    fitness_axis.set_title(path)
+    for name, color in [("best_fitness", "red"), ("mean_fitness", "blue"), ("worst_fitness", "gray")]:
+        fitness_axis.plot(generations, [record[name] for record in records], color=color, label=name)
+    fitness_axis.set_ylabel("Fitness value")
+    fitness_axis.legend()
+    diversity_axis.plot(generations, [record["diversity"] for record in records], color="green")
+    diversity_axis.set_xlabel("Generation number")
+    diversity_axis.set_ylabel("Diversity")
+    if figure_path is None:
+        plt.show()
+    else:
+        figure.savefig(figure_path)
+
+
+if __name__ == '__main__':
+    plot_telemetry(sys.argv[1], sys.argv[2] if len(sys.argv) > 2 else None)
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import sparse_layouts
+
+
+class Population:
+    # Genomes live in one contiguous (size, cell_num) uint8 array, or (size, ceil(cell_num / 8)) when bit-packed,
+    # and every per-layout value is a parallel 1-D array indexed the same way.
+    # reverse follows sorted(): False when a lower fitness is better, True when a higher one is.
+    # column_powers, when known, is the (size, column_num) power of every column so offspring can inherit it.
+    # sparse genomes hold the turbine cells of every layout instead, see sparse_layouts.py.
+
+    def __init__(self, genomes, power, fitness, cost=None, turbine_num=None, reverse=False, packed=False, cell_num=None,
+                 column_powers=None, sparse=False):
+        self.genomes = np.ascontiguousarray(genomes, dtype=sparse_layouts.cell_dtype if sparse else np.uint8)
+        self.packed = packed
+        self.sparse = sparse
+        self.cell_num = self.genomes.shape[1] if cell_num is None else cell_num
+        self.power = np.asarray(power, dtype=float)
+        self.fitness = np.asarray(fitness, dtype=float)
+        self.cost = np.zeros(len(self.power)) if cost is None else np.asarray(cost, dtype=float)
+        if turbine_num is None and sparse:
+            turbine_num = np.full(len(self.genomes), self.genomes.shape[1])
+        elif turbine_num is None:
+            turbine_num = np.count_nonzero(self.get_raw_arrays(), axis=1)
+        self.turbine_num = np.asarray(turbine_num, dtype=np.int64)
+        self.reverse = reverse
+        self.column_powers = None if column_powers is None else np.asarray(column_powers, dtype=float)
+
+    def __len__(self):
+        return len(self.fitness)
+
+    def get_raw_arrays(self):
+        if self.sparse:
+            return sparse_layouts.get_raw_arrays(self.genomes, self.cell_num)
+        if self.packed:
+            return np.unpackbits(self.genomes, axis=1, count=self.cell_num)
+        return self.genomes
+
+    def get_raw_array(self, index):
+        if self.sparse:
+            return sparse_layouts.get_raw_arrays(self.genomes[index:index + 1], self.cell_num)[0]
+        if self.packed:
+            return np.unpackbits(self.genomes[index], count=self.cell_num)
+        return self.genomes[index]
+
+    def get_packed(self):
+        # sparse genomes are packed as raw_arrays too, so checkpoints and islands keep one format
+        if self.packed:
+            return self
+        return Population(np.packbits(self.get_raw_arrays(), axis=1), self.power, self.fitness, self.cost, self.turbine_num,
+                          self.reverse, packed=True, cell_num=self.cell_num, column_powers=self.column_powers)
+
+    def get_unpacked(self):
+        if not self.packed:
+            return self
+        return Population(self.get_raw_arrays(), self.power, self.fitness, self.cost, self.turbine_num, self.reverse,
+                          column_powers=self.column_powers)
+
+    def get_sparse(self):
+        if self.sparse:
+            return self
+        return Population(sparse_layouts.get_cells(self.get_raw_arrays()), self.power, self.fitness, self.cost, self.turbine_num,
+                          self.reverse, cell_num=self.cell_num, column_powers=self.column_powers, sparse=True)
+
+    def get_sort_keys(self):
+        return -self.fitness if self.reverse else self.fitness
+
+    def get_top_indexes(self, count):
+        # indexes of the best "count" layouts, best first, without sorting the whole population.
+        # Ties are broken by position, so the result is the prefix of a stable sort like sorted() gives.
+        count = max(0, min(count, len(self)))
+        keys = self.get_sort_keys()
+        if 0 < count < len(self):
+            kth_key = np.partition(keys, count - 1)[count - 1]
+            better_indexes = np.flatnonzero(keys < kth_key)
+            tie_indexes = np.flatnonzero(keys == kth_key)[:count - len(better_indexes)]
+            indexes = np.sort(np.concatenate((better_indexes, tie_indexes)))
+        else:
+            indexes = np.arange(count)
+        return indexes[np.argsort(keys[indexes], kind="stable")]
+
+    def get_best_index(self):
+        return int(np.argmin(self.get_sort_keys()))
+
+    def take(self, indexes):
+        column_powers = None if self.column_powers is None else self.column_powers[indexes]
+        return Population(self.genomes[indexes], self.power[indexes], self.fitness[indexes], self.cost[indexes],
+                          self.turbine_num[indexes], self.reverse, self.packed, self.cell_num, column_powers, self.sparse)
+
+    def get_layout(self, index):
+        return {
+            "raw_array": self.get_raw_array(index),
+            "power": float(self.power[index]),
+            "fitness": float(self.fitness[index]),
+            "cost": float(self.cost[index]),
+            "turbine_num": int(self.turbine_num[index])
+        }
+
+
+def concatenate_populations(populations):
+    first = populations[0]
+    column_powers = None
+    if all(p.column_powers is not None for p in populations):
+        column_powers = np.concatenate([p.column_powers for p in populations])
+    return Population(np.concatenate([p.genomes for p in populations]),
+                      np.concatenate([p.power for p in populations]),
+                      np.concatenate([p.fitness for p in populations]),
+                      np.concatenate([p.cost for p in populations]),
+                      np.concatenate([p.turbine_num for p in populations]),
+                      first.reverse, first.packed, first.cell_num, column_powers, first.sparse)
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+
+import contextlib
+import time
+
+phase_names = ["random", "selection", "crossover", "mutation", "evaluation", "sorting"]
+
+
+class PhaseProfiler:
+    # Wall time and call count of every phase of a generation. start_generation and end_generation bracket
+    # one generation and append its record to generation_records, time spent outside the phases is "other".
+
+    def __init__(self):
+        self.generation_records = []
+        self.phase_times = {}
+        self.phase_calls = {}
+        self.generation_start_time = None
+
+    def start_generation(self):
+        self.phase_times = {name: 0.0 for name in phase_names}
+        self.phase_calls = {name: 0 for name in phase_names}
+        self.generation_start_time = time.perf_counter()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        phase_start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phase_times[name] = self.phase_times.get(name, 0.0) + time.perf_counter() - phase_start_time
+            self.phase_calls[name] = self.phase_calls.get(name, 0) + 1
+
+    @contextlib.contextmanager
+    def phase_after_generation(self, name):
+        # a phase run between generations, added to the record of the last one. Before the first record it is not kept.
+        phase_start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            if len(self.generation_records) > 0:
+                phase_time = time.perf_counter() - phase_start_time
+                record = self.generation_records[-1]
+                record["phase_times"][name] = record["phase_times"].get(name, 0.0) + phase_time
+                record["phase_calls"][name] = record["phase_calls"].get(name, 0) + 1
+                record["wall_time"] += phase_time
+                record["evaluations_per_sec"] = record["evaluations"] / record["wall_time"]
+
+    def end_generation(self, cache_stats):
+        # cache_stats is the generation's record of the fitness cache, every lookup is one evaluated layout
+        wall_time = time.perf_counter() - self.generation_start_time
+        evaluations = cache_stats["hits"] + cache_stats["misses"]
+        self.generation_records.append({
+            "generation": len(self.generation_records),
+            "wall_time": wall_time,
+            "phase_times": dict(self.phase_times),
+            "phase_calls": dict(self.phase_calls),
+            "other_time": max(0.0, wall_time - sum(self.phase_times.values())),
+            "evaluations": evaluations,
+            "evaluations_per_sec": evaluations / wall_time if wall_time > 0 else 0.0,
+            "cache": dict(cache_stats)
+        })
+
+
+def print_phase_summary(generation_records):
+    wall_time = sum(record["wall_time"] for record in generation_records)
+    evaluations = sum(record["evaluations"] for record in generation_records)
+    hits = sum(record["cache"]["hits"] for record in generation_records)
+    names = phase_names + sorted(set(name for record in generation_records for name in record["phase_times"]) - set(phase_names))
+
+    print("-------------  Phase Profile  -------------")
+    print("Generations          : " + str(len(generation_records)))
+    print("phase".ljust(12) + "time (s)".rjust(12) + "calls".rjust(10) + "share".rjust(10))
+    for name in names + ["other"]:
+        if name == "other":
+            phase_time = sum(record["other_time"] for record in generation_records)
+            calls = ""
+        else:
+            phase_time = sum(record["phase_times"].get(name, 0.0) for record in generation_records)
+            calls = str(sum(record["phase_calls"].get(name, 0) for record in generation_records))
+        share = 100 * phase_time / wall_time if wall_time > 0 else 0.0
+        print(name.ljust(12) + ("%.4f" % phase_time).rjust(12) + calls.rjust(10) + ("%.1f %%" % share).rjust(10))
+    print("total".ljust(12) + ("%.4f" % wall_time).rjust(12))
+    print("Evaluations          : " + str(evaluations) + ", " + str(round(evaluations / wall_time if wall_time > 0 else 0.0, 1)) + " per sec")
+    print("Cache hits           : " + str(hits) + ", " + str(round(100 * hits / evaluations if evaluations > 0 else 0.0, 2)) + " %")
+    print("-------------  Phase Profile  -------------")
@@ -0,0 +1,112 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import operators
+
+# Sparse genomes for fixed turbine counts on large grids: a (size, turbine_num) int32 array holding the turbine cells
+# of every layout in increasing order. A cell is column * row_num + row like in a raw_array, so a row of cells lists
+# the turbines column by column, each column from its first row down. Random layouts, operators and evaluation take
+# time and memory in proportion to the turbines, not to cell_num.
+
+cell_dtype = np.int32
+
+
+def get_cells(raw_arrays):
+    raw_arrays = np.asarray(raw_arrays)
+    turbine_nums = np.count_nonzero(raw_arrays, axis=1)
+    if len(raw_arrays) > 0 and np.any(turbine_nums != turbine_nums[0]):
+        raise ValueError("sparse genomes need the same turbine count in every layout")
+    return np.nonzero(raw_arrays)[1].astype(cell_dtype).reshape(len(raw_arrays), -1)
+
+
+def get_raw_arrays(cells, cell_num):
+    raw_arrays = np.zeros((len(cells), cell_num), dtype=np.uint8)
+    raw_arrays[np.arange(len(cells))[:, None], cells] = 1
+    return raw_arrays
+
+
+def get_is_member(cells, other_cells, cell_num):
+    # is_member[i, j] tells whether cells[i, j] is one of other_cells[i], both sorted row by row.
+    # Shifting row i by i * cell_num makes other_cells one sorted array that a single searchsorted covers.
+    offsets = np.arange(len(cells), dtype=np.int64)[:, None] * cell_num
+    flat_other_cells = (other_cells + offsets).ravel()
+    flat_cells = (cells + offsets).ravel()
+    if len(flat_other_cells) == 0:
+        return np.zeros(cells.shape, dtype=bool)
+    positions = np.minimum(np.searchsorted(flat_other_cells, flat_cells), len(flat_other_cells) - 1)
+    return (flat_other_cells[positions] == flat_cells).reshape(cells.shape)
+
+
+def get_random_positions(is_valid, rng):
+    # one uniformly drawn True position per row of is_valid, and whether the row has one
+    scores = np.where(is_valid, rng.random(is_valid.shape), -1.0)
+    return np.argmax(scores, axis=1), np.any(is_valid, axis=1)
+
+
+def get_random_cells(size, cell_num, turbine_num, rng):
+    # Draws again every cell repeating another of its layout until none does, which leaves every set of cells
+    # equally likely and takes few rounds while turbine_num is small next to cell_num. Dense grids are shuffled instead.
+    if 2 * turbine_num > cell_num:
+        return get_cells(operators.get_random_raw_arrays(size, cell_num, np.full(size, turbine_num), rng))
+    cells = np.sort(rng.integers(0, cell_num, (size, turbine_num), dtype=cell_dtype), axis=1)
+    while True:
+        is_repeated = np.zeros(cells.shape, dtype=bool)
+        is_repeated[:, 1:] = cells[:, 1:] == cells[:, :-1]
+        repeated_num = np.count_nonzero(is_repeated)
+        if repeated_num == 0:
+            return cells
+        cells[is_repeated] = rng.integers(0, cell_num, repeated_num, dtype=cell_dtype)
+        cells.sort(axis=1)
+
+
+def make_swap_crossover(cells, cell_num, rng):
+    # operators.make_swap_crossover on sparse genomes: the first layout of a pair takes one turbine cell of the second
+    # and gives back one of its own
+    first = cells[0::2]
+    second = cells[1::2]
+    give_one_positions, has_give_one = get_random_positions(~get_is_member(second, first, cell_num), rng)
+    give_zero_positions, has_give_zero = get_random_positions(~get_is_member(first, second, cell_num), rng)
+    pairs = np.flatnonzero(has_give_one & has_give_zero)
+    give_one_cells = second[pairs, give_one_positions[pairs]]
+    give_zero_cells = first[pairs, give_zero_positions[pairs]]
+    cells[2 * pairs, give_zero_positions[pairs]] = give_one_cells
+    cells[2 * pairs + 1, give_one_positions[pairs]] = give_zero_cells
+    cells.sort(axis=1)
+
+
+def make_swap_mutation(cells, cell_num, rng):
+    # operators.make_swap_mutation on sparse genomes: one random turbine of every layout moves to a random empty cell
+    size, turbine_num = cells.shape
+    if turbine_num == 0 or turbine_num >= cell_num:
+        return
+    new_cells = rng.integers(0, cell_num, size, dtype=cell_dtype)
+    taken_rows = np.flatnonzero(get_is_member(new_cells[:, None], cells, cell_num)[:, 0])
+    while len(taken_rows) > 0:
+        new_cells[taken_rows] = rng.integers(0, cell_num, len(taken_rows), dtype=cell_dtype)
+        taken_rows = taken_rows[get_is_member(new_cells[taken_rows, None], cells[taken_rows], cell_num)[:, 0]]
+    cells[np.arange(size), rng.integers(0, turbine_num, size)] = new_cells
+    cells.sort(axis=1)
+
+
+def get_column_powers(column_power_table, cells):
+    # (size, column_num) column powers of sparse genomes. The turbines are walked in cell order, so a turbine's
+    # upstream neighbour is the one before it when both share a column, and every column adds up its turbines
+    # from the first row down like wake.ColumnPowerTable does.
+    row_num = column_power_table.row_num
+    size, turbine_num = cells.shape
+    columns = cells // row_num
+    rows = cells % row_num
+    wake_factors = np.array(column_power_table.wake_factors)
+    layout_indexes = np.arange(size)
+    column_powers = np.zeros((size, column_power_table.column_num))
+    speed = np.zeros(size)
+    for turbine_index in range(turbine_num):
+        has_upstream = np.zeros(size, dtype=bool)
+        if turbine_index > 0:
+            has_upstream = columns[:, turbine_index] == columns[:, turbine_index - 1]
+        gaps = np.where(has_upstream, rows[:, turbine_index] - rows[:, turbine_index - 1], 0)
+        reduced_speed = speed * wake_factors[gaps]
+        reduced_speed[reduced_speed < column_power_table.cut_in_wind_speed] = 0
+        speed = np.where(has_upstream, reduced_speed, column_power_table.avg_wind_speed)
+        column_powers[layout_indexes, columns[:, turbine_index]] += column_power_table.power_constant * (speed ** 3) / 1000
+    return column_powers
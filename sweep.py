@@ -0,0 +1,176 @@
+# -*- coding: utf-8 -*-
+
+import concurrent.futures
+import csv
+import importlib
+import itertools
+import json
+import os
+import sys
+import time
+from multiprocessing import resource_tracker, shared_memory
+import numpy as np
+import bounds
+import engine
+
+# Runs a model once for every point of a parameter grid, spread over a process pool. A grid name is either a
+# Config setting or an attribute of the model's objective, like turbine_num. Column power tables and column
+# best powers only depend on the wake geometry, so each distinct geometry is computed once, placed in shared
+# memory and read by every run that has it. A results row is appended to results_path as soon as its run ends.
+
+parameter_grid = {
+    "rotor_diameter": [40, 50],
+    "thrust_coefficient": [0.75, 0.88],
+    "er": [0.1, 0.2],
+    "turbine_num": [20, 30]
+}
+results_path = "sweep_results.csv"
+worker_num = os.cpu_count()
+random_seed = 1         # seeds the runs of a model whose config has no random_seed
+result_names = ["evolve_num", "fitness", "power", "cost", "turbine_num", "bound", "evaluations", "elapsed_sec"]
+
+attached_arrays = {}    # shared arrays a worker has attached, by segment name, kept for the worker's life
+
+
+def get_sweep_points(grid):
+    names = list(grid)
+    return [dict(zip(names, values)) for values in itertools.product(*[grid[name] for name in names])]
+
+
+def get_point_model(model, point, seed):
+    # the config and objective of one point, other settings stay as the model declares them
+    changes = dict(point, checkpoint_path=None, telemetry_path=None)
+    if "random_seed" not in point and model.config.random_seed is None:
+        changes["random_seed"] = seed
+    return engine.get_changed_model(model.config, model.objective, changes)
+
+
+def get_geometry_key(config):
+    return (config.row_num, config.rotor_diameter, config.grid_size_ver, config.entrainment_constant, config.axial_ind_factor,
+            config.cut_in_wind_speed, config.avg_wind_speed, config.air_density, config.power_coefficient)
+
+
+def get_geometry_arrays(model_name, point, seed):
+    # runs in a worker, returns the tables every point of this point's wake geometry shares
+    config, objective = get_point_model(importlib.import_module(model_name), point, seed)
+    column_power_table = engine.get_column_power_table(config)
+    column_best_powers, column_best_is_exact = bounds.get_column_best_powers(column_power_table)
+    arrays = {"column_best_powers": column_best_powers, "column_best_is_exact": column_best_is_exact}
+    if column_power_table.dense_table is not None:
+        arrays["dense_table"] = column_power_table.dense_table
+    return arrays
+
+
+def share_arrays(arrays):
+    # copies every array into a new shared memory segment, returns what attach_arrays needs and the segments
+    descriptors = {}
+    segments = []
+    for name, array in arrays.items():
+        segment = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+        np.ndarray(array.shape, array.dtype, buffer=segment.buf)[...] = array
+        descriptors[name] = (segment.name, array.shape, array.dtype.str)
+        segments.append(segment)
+    return descriptors, segments
+
+
+def attach_arrays(descriptors):
+    arrays = {}
+    for name, (segment_name, shape, dtype) in descriptors.items():
+        if segment_name not in attached_arrays:
+            segment = shared_memory.SharedMemory(name=segment_name)
+            attached_arrays[segment_name] = (segment, np.ndarray(shape, dtype, buffer=segment.buf))
+        arrays[name] = attached_arrays[segment_name][1]
+    return arrays
+
+
+def run_sweep_point(model_name, point_index, point, seed, descriptors):
+    config, objective = get_point_model(importlib.import_module(model_name), point, seed)
+    arrays = attach_arrays(descriptors)
+    column_power_table = engine.get_column_power_table(config, arrays.get("dense_table"))
+    column_power_table.column_best_powers = (arrays["column_best_powers"], arrays["column_best_is_exact"])
+    model_engine = engine.Engine(config, objective, column_power_table)
+    row = {"point": point_index}
+    row.update(point)
+    row.update({
+        "random_seed": config.random_seed,
+        "row_num": config.row_num,
+        "column_num": config.column_num
+    })
+
+    # a point with invalid settings is not run, its row holds the warnings in place of the results
+    warning_msgs = model_engine.get_warning_msgs()
+    if len(warning_msgs) > 0:
+        row.update({name: None for name in result_names if name not in row})
+        row["error"] = " | ".join(warning_msgs)
+        return row
+
+    start = time.perf_counter()
+    result = model_engine.run_evolution()
+    elapsed_sec = time.perf_counter() - start
+    winner_lay = result["winner_lay"]
+    cache = model_engine.layout_fitness_cache
+    row.update({
+        "evolve_num": result["evolve_num"],
+        "fitness": winner_lay["fitness"],
+        "power": winner_lay["power"],
+        "cost": winner_lay["cost"] if objective.has_cost else None,
+        "turbine_num": winner_lay["turbine_num"],
+        "bound": model_engine.get_bound(),
+        "evaluations": cache.total_hits + cache.total_misses,
+        "elapsed_sec": round(elapsed_sec, 3),
+        "error": None
+    })
+    return row
+
+
+def start_sweep(model_name, grid, path):
+    model = importlib.import_module(model_name)
+    points = get_sweep_points(grid)
+    seeds = engine.get_child_seeds(random_seed, len(points))
+    geometry_keys = [get_geometry_key(get_point_model(model, point, seed)[0]) for point, seed in zip(points, seeds)]
+    first_indexes = {}
+    for point_index, geometry_key in enumerate(geometry_keys):
+        first_indexes.setdefault(geometry_key, point_index)
+    print("Sweep                : " + str(len(points)) + " points, " + str(len(first_indexes)) + " wake geometries")
+
+    # workers must share this process's resource tracker, their own would unlink the segments when they exit
+    resource_tracker.ensure_running()
+    segments = []
+    try:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=worker_num) as executor:
+            geometry_futures = {geometry_key: executor.submit(get_geometry_arrays, model_name, points[i], seeds[i])
+                                for geometry_key, i in first_indexes.items()}
+            descriptors = {}
+            for geometry_key, future in geometry_futures.items():
+                descriptors[geometry_key], geometry_segments = share_arrays(future.result())
+                segments += geometry_segments
+
+            futures = [executor.submit(run_sweep_point, model_name, point_index, point, seed, descriptors[geometry_key])
+                       for point_index, (point, seed, geometry_key) in enumerate(zip(points, seeds, geometry_keys))]
+            with open(path, "w", newline="") as results_file:
+                writer = None
+                for finished_num, future in enumerate(concurrent.futures.as_completed(futures)):
+                    row = future.result()
+                    if writer is None:
+                        writer = csv.DictWriter(results_file, fieldnames=list(row))
+                        writer.writeheader()
+                    writer.writerow(row)
+                    results_file.flush()
+                    outcome = ") fitness : " + str(row["fitness"]) if row["error"] is None else ") invalid : " + row["error"]
+                    print("Point " + str(row["point"]) + " done (" + str(finished_num + 1) + " / " + str(len(points)) + outcome)
+    finally:
+        for segment in segments:
+            segment.close()
+            segment.unlink()
+    print("Results written to " + path)
+
+
+if __name__ == '__main__':
+    # python sweep.py [model name] [grid .json file] [results .csv file]
+    model_name = sys.argv[1] if len(sys.argv) > 1 else "Model_B"
+    if len(sys.argv) > 2:
+        with open(sys.argv[2]) as grid_file:
+            parameter_grid = json.load(grid_file)
+    if len(sys.argv) > 3:
+        results_path = sys.argv[3]
+    start_sweep(model_name, parameter_grid, results_path)
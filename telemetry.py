@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+
+import csv
+import json
+import os
+import time
+import numpy as np
+import diversity
+
+
+class TelemetrySink:
+    # Appends one record per generation to a .jsonl file, or a .csv file when the path ends with .csv.
+    # Records wait in a buffer of at most buffer_size and are written once it is full or flush_interval
+    # seconds have passed, so a live run can be followed with tail -f without a write per generation.
+
+    def __init__(self, path, buffer_size=50, flush_interval=5.0, is_appended=False):
+        self.path = path
+        self.is_csv = path.endswith(".csv")
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self.records = []
+        self.last_flush_time = time.time()
+        self.is_header_written = is_appended and os.path.exists(path) and os.path.getsize(path) > 0
+        self.csv_writer = None
+        self.file = open(path, "a" if is_appended else "w", newline="")
+
+    def write(self, record):
+        self.records.append(record)
+        if len(self.records) >= self.buffer_size or time.time() - self.last_flush_time >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        for record in self.records:
+            if self.is_csv:
+                if self.csv_writer is None:
+                    self.csv_writer = csv.DictWriter(self.file, fieldnames=list(record))
+                    if not self.is_header_written:
+                        self.csv_writer.writeheader()
+                        self.is_header_written = True
+                self.csv_writer.writerow(record)
+            else:
+                self.file.write(json.dumps(record) + "\n")
+        self.records = []
+        self.file.flush()
+        self.last_flush_time = time.time()
+
+    def drop_records_after(self, generation):
+        # A resumed run starts again from its checkpoint, the records written past it would appear twice.
+        # The file is rewritten aside without them and renamed over the old one.
+        self.flush()
+        self.file.close()
+        temp_path = self.path + ".tmp"
+        with open(self.path, newline="") as old_file, open(temp_path, "w", newline="") as new_file:
+            if self.is_csv:
+                rows = csv.reader(old_file)
+                header = next(rows, None)
+                if header is not None:
+                    writer = csv.writer(new_file)
+                    writer.writerow(header)
+                    generation_index = header.index("generation")
+                    writer.writerows(row for row in rows if float(row[generation_index]) <= generation)
+            else:
+                new_file.writelines(line for line in old_file if line.strip() and json.loads(line)["generation"] <= generation)
+        os.replace(temp_path, self.path)
+        self.file = open(self.path, "a", newline="")
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+def read_records(path):
+    with open(path, newline="") as telemetry_file:
+        if path.endswith(".csv"):
+            return [{name: float(value) for name, value in row.items()} for row in csv.DictReader(telemetry_file)]
+        return [json.loads(line) for line in telemetry_file if line.strip()]
+
+
+def get_population_stats(generation):
+    keys = generation.get_sort_keys()
+    stats = {
+        "best_fitness": float(generation.fitness[np.argmin(keys)]),
+        "mean_fitness": float(np.mean(generation.fitness)),
+        "worst_fitness": float(generation.fitness[np.argmax(keys)])
+    }
+    stats.update(diversity.get_diversity_stats(generation.get_unpacked().genomes, generation.cell_num))
+    return stats
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import bounds
+
+# Turbine count strata of the cost / power objective. Every count n has its cost and ratio_bounds[n], the lowest
+# cost / power any layout of n turbines can reach. A count whose bound is above the best ratio of the last generation
+# can never win, so a stratified run draws the counts of its random layouts among the others only, each weighted by
+# how far its bound is below that ratio. A count is no longer drawn once a layout of the generation reached its bound.
+
+
+class TurbineNumStrata:
+
+    def __init__(self, costs):
+        self.costs = costs
+        self.layout_best_powers = None      # set once the objective needs the bounds
+        self.ratio_bounds = None
+        self.weights = None                 # drawing weight of every count for the current generation, None draws them uniformly
+
+    def set_layout_best_powers(self, layout_best_powers):
+        self.layout_best_powers = layout_best_powers
+        self.ratio_bounds = np.full(len(self.costs), np.inf)
+        has_power = layout_best_powers > 0
+        has_power[0] = False
+        self.ratio_bounds[has_power] = self.costs[has_power] / layout_best_powers[has_power]
+
+    def update_weights(self, generation):
+        # weights for the generation bred from this one, with no count left the draws are uniform again
+        best_ratios = np.full(len(self.costs), np.inf)
+        np.minimum.at(best_ratios, generation.turbine_num, generation.fitness)
+        weights = np.maximum(np.min(best_ratios) - self.ratio_bounds, 0)
+        weights[best_ratios <= self.ratio_bounds * (1 + bounds.ratio_tolerance)] = 0
+        weights[0] = 0
+        weights[-1] = 0
+        self.weights = weights / np.sum(weights) if np.sum(weights) > 0 else None
+
+    def get_turbine_nums(self, size, rng):
+        if self.weights is None:
+            return rng.integers(1, len(self.costs) - 1, size)
+        return rng.choice(len(self.costs), size, p=self.weights)
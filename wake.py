@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+
+import functools
+import importlib
+import importlib.util
+import math
+import numpy as np
+
+dense_table_max_row_num = 16    # columns up to this height get a full 2 ** row_num table
+column_memo_size = 2 ** 16      # cached column patterns for taller columns
+kernel_dense_min_row_num = 14   # dense tables this tall are built by the numba kernel, shorter ones take less time than loading it
+
+# wake backends: "numpy" evaluates tall columns through the memo or walks their rows at once, "numba" runs wake_kernels.py,
+# None picks numba when it loads
+wake_backend_names = ["numpy", "numba"]
+is_numba_installed = importlib.util.find_spec("numba") is not None
+loaded_modules = {}             # wake_kernels once imported, None when numba failed to load
+
+
+def get_wake_factors(row_num, rotor_diameter, grid_size_ver, entrainment_constant, axial_ind_factor):
+    # wake_factors[counter] is the speed ratio behind a turbine "counter" cells upstream, index 0 is unused
+    wake_factors = [1.0]
+    for counter in range(1, row_num):
+        wake_factors.append(1 - 2 * axial_ind_factor * ((rotor_diameter / 2) / (rotor_diameter / 2 + entrainment_constant * grid_size_ver * rotor_diameter * counter)) ** 2)
+    return wake_factors
+
+
+def get_wake_kernels(wake_backend):
+    # the wake_kernels module, or None for the numpy backend. numba is only imported here, the first time a table needs it.
+    if wake_backend == "numpy" or not is_numba_installed:
+        return None
+    if "wake_kernels" not in loaded_modules:
+        try:
+            loaded_modules["wake_kernels"] = importlib.import_module("wake_kernels")
+        except ImportError:
+            loaded_modules["wake_kernels"] = None
+    return loaded_modules["wake_kernels"]
+
+
+class ColumnPowerTable:
+    # The wake only comes from the nearest upstream turbine of the same column, so the power of a column
+    # depends on its own 0/1 pattern only. Short columns get a dense table indexed by the pattern bits,
+    # tall columns share a bounded memo keyed by the packed pattern. A dense_table computed elsewhere for the same
+    # wake geometry can be handed in instead of being rebuilt. wake_backend is one of wake_backend_names or None.
+
+    def __init__(self, row_num, column_num, rotor_diameter, grid_size_ver, entrainment_constant, axial_ind_factor,
+                 cut_in_wind_speed, avg_wind_speed, air_density, power_coefficient, dense_table=None, wake_backend=None):
+        self.row_num = row_num
+        self.column_num = column_num
+        self.cut_in_wind_speed = cut_in_wind_speed
+        self.avg_wind_speed = avg_wind_speed
+        self.power_constant = 0.5 * power_coefficient * air_density * math.pi * ((rotor_diameter ** 2) / 4)
+        self.wake_factors = get_wake_factors(row_num, rotor_diameter, grid_size_ver, entrainment_constant, axial_ind_factor)
+        self.wake_backend = wake_backend
+
+        self.dense_table = None
+        self.pattern_weights = None
+        if row_num <= dense_table_max_row_num:
+            self.pattern_weights = 1 << np.arange(row_num, dtype=np.int64)
+            self.dense_table = dense_table
+            wake_kernels = get_wake_kernels(wake_backend) if row_num >= kernel_dense_min_row_num else None
+            if dense_table is None and wake_kernels is not None:
+                patterns = np.arange(2 ** row_num)
+                self.dense_table = self.get_kernel_column_powers(wake_kernels, (patterns[:, None] >> np.arange(row_num)) & 1)
+            elif dense_table is None:
+                self.dense_table = np.array([self.get_column_power(self.get_column_from_pattern(pattern))
+                                             for pattern in range(2 ** row_num)])
+        self.column_best_powers = None      # (best_powers, is_exact) of bounds.get_column_best_powers, kept once computed
+        self.get_memo_column_power = functools.lru_cache(maxsize=column_memo_size)(self.get_packed_column_power)
+
+    def get_column_from_pattern(self, pattern):
+        return [(pattern >> row) & 1 for row in range(self.row_num)]
+
+    def get_column_wind_speeds(self, column):
+        wind_speed = []
+        last_row = -1
+        for cellIndex in range(len(column)):
+            if column[cellIndex] == 1:
+                if last_row < 0:
+                    wind_speed.append(self.avg_wind_speed)
+                else:
+                    reduced_speed = wind_speed[-1] * self.wake_factors[cellIndex - last_row]
+                    if reduced_speed < self.cut_in_wind_speed:
+                        reduced_speed = 0
+                    wind_speed.append(reduced_speed)
+                last_row = cellIndex
+        return wind_speed
+
+    def get_column_power(self, column):
+        column_power = 0
+        for speed in self.get_column_wind_speeds(column):
+            column_power = column_power + self.power_constant * (speed ** 3) / 1000
+        return column_power
+
+    def get_packed_column_power(self, packed_column):
+        column = np.unpackbits(np.frombuffer(packed_column, dtype=np.uint8))[:self.row_num]
+        return self.get_column_power(column)
+
+    def get_column_powers(self, columns):
+        # columns: (..., row_num) 0/1 array, returns the power of every column with the same leading shape
+        columns = np.asarray(columns)
+        if self.dense_table is not None:
+            return self.dense_table[columns @ self.pattern_weights]
+        packed_columns = np.packbits(columns.astype(np.uint8, copy=False), axis=-1)
+        column_powers = [self.get_memo_column_power(packed.tobytes()) for packed in packed_columns.reshape(-1, packed_columns.shape[-1])]
+        return np.array(column_powers, dtype=float).reshape(columns.shape[:-1])
+
+    def get_kernel_column_powers(self, wake_kernels, columns):
+        columns = np.asarray(columns)
+        flat_columns = np.ascontiguousarray(columns, dtype=np.uint8).reshape(-1, self.row_num)
+        column_powers = wake_kernels.get_wake_column_powers(flat_columns, np.array(self.wake_factors), float(self.avg_wind_speed),
+                                                            float(self.cut_in_wind_speed), float(self.power_constant))
+        return column_powers.reshape(columns.shape[:-1])
+
+    def get_cell_wind_speeds(self, columns):
+        # Same recurrence as get_column_wind_speeds, walked row by row over every column of the batch at once.
+        # Returns the (..., row_num) speed at every turbine, 0 at empty cells.
+        columns = np.asarray(columns) == 1
+        leading_shape = columns.shape[:-1]
+        wake_factors = np.array(self.wake_factors)
+        speed = np.zeros(leading_shape)
+        last_row = np.full(leading_shape, -1)
+        cell_speeds = np.zeros(columns.shape)
+        for row in range(columns.shape[-1]):
+            is_turbine = columns[..., row]
+            has_upstream = last_row >= 0
+            reduced_speed = speed * wake_factors[np.where(has_upstream, row - last_row, 0)]
+            reduced_speed[reduced_speed < self.cut_in_wind_speed] = 0
+            row_speed = np.where(has_upstream, reduced_speed, self.avg_wind_speed)
+            speed = np.where(is_turbine, row_speed, speed)
+            last_row = np.where(is_turbine, row, last_row)
+            cell_speeds[..., row] = np.where(is_turbine, row_speed, 0)
+        return cell_speeds
+
+    def get_wake_column_powers(self, columns):
+        # The numba kernel gives get_column_power's result exactly, the numpy walk of get_cell_wind_speeds
+        # can differ from it in the last bit.
+        wake_kernels = get_wake_kernels(self.wake_backend)
+        if wake_kernels is not None:
+            return self.get_kernel_column_powers(wake_kernels, columns)
+        is_turbine = np.asarray(columns) == 1
+        cell_speeds = self.get_cell_wind_speeds(is_turbine)
+        column_powers = np.zeros(is_turbine.shape[:-1])
+        for row in range(is_turbine.shape[-1]):
+            column_powers = column_powers + np.where(is_turbine[..., row], self.power_constant * (cell_speeds[..., row] ** 3) / 1000, 0)
+        return column_powers
+
+    def get_batch_column_powers(self, columns):
+        # Without the kernel, tall columns go through the memo. Their patterns repeat so much within a generation
+        # that it beats the numpy walk even when cold, and it gives get_column_power's result exactly.
+        if self.dense_table is not None or get_wake_kernels(self.wake_backend) is None:
+            return self.get_column_powers(columns)
+        return self.get_wake_column_powers(columns)
+
+    def get_total_powers(self, column_powers):
+        # column_powers: (population, column_num), summed column by column like get_layout_power does
+        total_powers = np.zeros(column_powers.shape[0])
+        for column_index in range(column_powers.shape[1]):
+            total_powers = total_powers + column_powers[:, column_index]
+        return np.array([round(power, 4) for power in total_powers.tolist()])
+
+    def get_layout_powers(self, layouts):
+        # layouts: (population, column_num, row_num) 0/1 array, returns the rounded power of every layout
+        return self.get_total_powers(self.get_batch_column_powers(layouts))
+
+    def get_offspring_column_powers(self, parent_layouts, parent_column_powers, mate_layouts, mate_column_powers, child_layouts):
+        # Child i was made from parent i and its mate i. Every column it shares with one of them
+        # inherits that layout's power, only the remaining columns go through the wake model again.
+        parent_layouts = np.asarray(parent_layouts)
+        child_layouts = np.asarray(child_layouts)
+        column_powers = parent_column_powers.copy()
+        is_changed = np.any(child_layouts != parent_layouts, axis=2)
+        is_from_mate = is_changed & np.all(child_layouts == mate_layouts, axis=2)
+        column_powers[is_from_mate] = mate_column_powers[is_from_mate]
+        is_dirty = is_changed & ~is_from_mate
+        if np.any(is_dirty):
+            column_powers[is_dirty] = self.get_batch_column_powers(child_layouts[is_dirty])
+        return column_powers
+
+    def get_layout_power(self, raw_array):
+        column_powers = self.get_column_powers(np.reshape(raw_array, (self.column_num, self.row_num)))
+        return round(sum(column_powers.tolist()), 4)
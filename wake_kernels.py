@@ -0,0 +1,31 @@
+# -*- coding: utf-8 -*-
+
+import numba
+import numpy as np
+
+# Numba kernel of the column wake recurrence, imported by wake.py only when a table needs it. Every column is walked
+# on its own with the arithmetic of wake.ColumnPowerTable.get_column_power, so its powers are the same to the last
+# bit, and the columns are spread over all cores. The compiled kernel is cached on disk in __pycache__, later runs
+# only load it.
+
+
+@numba.njit(parallel=True, cache=True)
+def get_wake_column_powers(columns, wake_factors, avg_wind_speed, cut_in_wind_speed, power_constant):
+    # columns: (column count, row_num) 0/1 uint8 array, returns the power of every column
+    column_powers = np.zeros(columns.shape[0])
+    for column_index in numba.prange(columns.shape[0]):
+        speed = 0.0
+        last_row = -1
+        column_power = 0.0
+        for row in range(columns.shape[1]):
+            if columns[column_index, row] != 0:
+                if last_row >= 0:
+                    speed = speed * wake_factors[row - last_row]
+                    if speed < cut_in_wind_speed:
+                        speed = 0.0
+                else:
+                    speed = avg_wind_speed
+                column_power = column_power + power_constant * (speed ** 3.0) / 1000
+                last_row = row
+        column_powers[column_index] = column_power
+    return column_powers
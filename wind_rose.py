@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+
+import math
+import numpy as np
+
+wake_lane_width = 1.0   # in diameter, a turbine is waked by upstream turbines closer than this crosswind
+
+
+class WindRoseEvaluator:
+    # Evaluates layouts of the row_num x column_num grid under several wind direction/speed bins.
+    # wind_rose is a list of (direction, wind_speed, probability) with the direction in degrees measured
+    # from the column axis, 0 being the single direction both models assume, turning toward the next column.
+    # For every direction the upstream candidates of every cell, nearest first, and their wake factors are
+    # precomputed. As in the column model a turbine is slowed by its nearest upstream turbine only.
+
+    def __init__(self, row_num, column_num, rotor_diameter, grid_size_ver, grid_size_hor, entrainment_constant,
+                 axial_ind_factor, cut_in_wind_speed, air_density, power_coefficient, wind_rose):
+        self.cell_num = row_num * column_num
+        self.cut_in_wind_speed = cut_in_wind_speed
+        self.power_constant = 0.5 * power_coefficient * air_density * math.pi * ((rotor_diameter ** 2) / 4)
+        self.probabilities = np.array([probability for direction, wind_speed, probability in wind_rose], dtype=float)
+        self.wind_speeds = np.array([wind_speed for direction, wind_speed, probability in wind_rose], dtype=float)
+
+        cell_indexes = np.arange(self.cell_num)
+        y = (cell_indexes % row_num) * grid_size_ver * rotor_diameter
+        x = (cell_indexes // row_num) * grid_size_hor * rotor_diameter
+        self.directions = []
+        for direction in sorted(set(direction for direction, wind_speed, probability in wind_rose)):
+            angle = math.radians(direction)
+            along = y * math.cos(angle) + x * math.sin(angle)
+            across = x * math.cos(angle) - y * math.sin(angle)
+            candidate_lists = []
+            for cell in range(self.cell_num):
+                # downwind distances in row spacings, so the column axis reproduces the integer counters of the column model
+                counters = (along[cell] - along) / (grid_size_ver * rotor_diameter)
+                candidates = np.flatnonzero((counters > 1e-9) & (np.abs(across[cell] - across) < wake_lane_width * rotor_diameter))
+                candidate_lists.append(candidates[np.argsort(counters[candidates], kind="stable")])
+            candidate_num = max(1, max(len(candidates) for candidates in candidate_lists))
+            upstream_cells = np.zeros((self.cell_num, candidate_num), dtype=np.int64)
+            upstream_factors = np.ones((self.cell_num, candidate_num))
+            upstream_counts = np.array([len(candidates) for candidates in candidate_lists], dtype=np.int64)
+            for cell, candidates in enumerate(candidate_lists):
+                upstream_cells[cell, :len(candidates)] = candidates
+                counters = (along[cell] - along[candidates]) / (grid_size_ver * rotor_diameter)
+                for k, counter in enumerate(counters.tolist()):
+                    upstream_factors[cell, k] = 1 - 2 * axial_ind_factor * ((rotor_diameter / 2) / (rotor_diameter / 2 + entrainment_constant * grid_size_ver * rotor_diameter * counter)) ** 2
+            self.directions.append({
+                "bins": np.array([i for i, (d, s, p) in enumerate(wind_rose) if d == direction]),
+                "order": np.argsort(along, kind="stable"),
+                "upstream_cells": upstream_cells,
+                "upstream_factors": upstream_factors,
+                "upstream_counts": upstream_counts
+            })
+
+    def get_turbine_powers(self, speeds):
+        return np.where(speeds < self.cut_in_wind_speed, 0, self.power_constant * (speeds ** 3) / 1000)
+
+    def get_free_turbine_power(self):
+        # probability weighted power of one turbine outside every wake
+        return float(np.sum(self.probabilities * self.get_turbine_powers(self.wind_speeds)))
+
+    def get_bin_powers(self, raw_arrays):
+        # (population, bin) unweighted power of every layout under every bin
+        is_turbine = np.asarray(raw_arrays).reshape(-1, self.cell_num) == 1
+        population_size = len(is_turbine)
+        population_indexes = np.arange(population_size)
+        bin_powers = np.zeros((population_size, len(self.wind_speeds)))
+        for direction in self.directions:
+            free_speeds = self.wind_speeds[direction["bins"]]
+            free_speeds = np.where(free_speeds < self.cut_in_wind_speed, 0, free_speeds)
+            speeds = np.zeros((population_size, len(free_speeds), self.cell_num))
+            powers = np.zeros((population_size, len(free_speeds)))
+            for cell in direction["order"].tolist():
+                upstream_count = direction["upstream_counts"][cell]
+                cell_speeds = np.broadcast_to(free_speeds, (population_size, len(free_speeds)))
+                if upstream_count > 0:
+                    upstream_cells = direction["upstream_cells"][cell, :upstream_count]
+                    is_upstream_turbine = is_turbine[:, upstream_cells]
+                    nearest = np.argmax(is_upstream_turbine, axis=1)
+                    reduced_speeds = speeds[population_indexes, :, upstream_cells[nearest]] * direction["upstream_factors"][cell, nearest][:, None]
+                    reduced_speeds[reduced_speeds < self.cut_in_wind_speed] = 0
+                    cell_speeds = np.where(np.any(is_upstream_turbine, axis=1)[:, None], reduced_speeds, cell_speeds)
+                cell_speeds = np.where(is_turbine[:, cell][:, None], cell_speeds, 0)
+                speeds[:, :, cell] = cell_speeds
+                powers = powers + np.where(is_turbine[:, cell][:, None], self.power_constant * (cell_speeds ** 3) / 1000, 0)
+            bin_powers[:, direction["bins"]] = powers
+        return bin_powers
+
+    def get_layout_powers(self, raw_arrays):
+        # probability weighted power of every layout, not rounded
+        return self.get_bin_powers(raw_arrays) @ self.probabilities